@@ -1,15 +1,27 @@
 import cv2
+import logging
 import threading
+import time
+from collections import deque
 from PyQt5.QtCore import pyqtSignal, QThread
 from cv2_enumerate_cameras import enumerate_cameras
 
+from camera_probe import probe_cameras
+from frame_pipeline import FramePipeline, create_executor
+from undistort import Undistorter
+
+logger = logging.getLogger(__name__)
+
 class CameraThread(QThread):
     frame_ready = pyqtSignal(object)
     error = pyqtSignal(str)
 
-    def __init__(self, camera_index):
+    def __init__(self, camera_index, pipeline=None, transform=None):
         super().__init__()
         self.camera_index = camera_index
+        self.pipeline = pipeline
+        # Applied on this thread before a frame leaves it, e.g. undistortion
+        self.transform = transform
         self.running = False
         self.cap = None
 
@@ -30,7 +42,13 @@ class CameraThread(QThread):
             while self.running:
                 ret, frame = self.cap.read()
                 if ret:
-                    self.frame_ready.emit(frame)
+                    if self.transform is not None:
+                        frame = self.transform(frame)
+                    if self.pipeline is not None:
+                        # Processed frames are emitted by the pipeline
+                        self.pipeline.submit(frame)
+                    else:
+                        self.frame_ready.emit(frame)
                 else:
                     self.error.emit(f"Error reading from camera {self.camera_index}")
                     break
@@ -51,26 +69,177 @@ class CameraThread(QThread):
             self.cap.release()
             self.cap = None
 
+class FramePairer:
+    """Pair frames from two cameras by nearest capture timestamp.
+
+    Each side keeps a bounded buffer of (timestamp, frame) tuples. A pair is
+    produced when the oldest frame on one side has a partner on the other side
+    within max_skew seconds; unmatched frames age out of the buffer.
+    """
+
+    def __init__(self, max_skew=0.015, buffer_size=4):
+        self.max_skew = max_skew
+        self.buffers = {
+            'left': deque(maxlen=buffer_size),
+            'right': deque(maxlen=buffer_size)
+        }
+        self.last_skew = None
+        self.dropped = 0
+
+    def push(self, side, timestamp, frame):
+        """Add a frame to one side of the buffer."""
+        buffer = self.buffers[side]
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append((timestamp, frame))
+
+    def pop_pair(self):
+        """
+        Return the next matched pair as (left, right, skew) or None.
+        Skew is right timestamp minus left timestamp in seconds.
+        """
+        left, right = self.buffers['left'], self.buffers['right']
+        while left and right:
+            left_time = left[0][0]
+            # Nearest right frame to the oldest left frame
+            best = min(range(len(right)), key=lambda i: abs(right[i][0] - left_time))
+            skew = right[best][0] - left_time
+            if abs(skew) <= self.max_skew:
+                # Right frames older than the match can no longer be paired
+                for _ in range(best):
+                    right.popleft()
+                    self.dropped += 1
+                _, left_frame = left.popleft()
+                _, right_frame = right.popleft()
+                self.last_skew = skew
+                return left_frame, right_frame, skew
+            # Drop whichever head frame is older, it has no partner
+            if left_time < right[0][0]:
+                left.popleft()
+            else:
+                right.popleft()
+            self.dropped += 1
+        return None
+
+
+class SynchronizedCameraThread(QThread):
+    """
+    Capture two cameras in lockstep.
+
+    Both devices are triggered with grab() back-to-back so the exposures are
+    as close as possible, then the frames are decoded with retrieve(). Each
+    frame is stamped with time.monotonic() taken right after its grab.
+    """
+    frames_ready = pyqtSignal(object, object, float)
+    skew_updated = pyqtSignal(float)
+    error = pyqtSignal(str)
+
+    def __init__(self, left_index, right_index, max_skew=0.015, buffer_size=4, transforms=None):
+        super().__init__()
+        self.camera_indices = {'left': left_index, 'right': right_index}
+        self.transforms = transforms or {}
+        self.pairer = FramePairer(max_skew, buffer_size)
+        self.running = False
+        self.caps = {}
+        self.frame_interval = 1.0 / 30
+
+    def _open(self, index):
+        cap = cv2.VideoCapture(index, cv2.CAP_DSHOW)
+        if not cap.isOpened():
+            return None
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        cap.set(cv2.CAP_PROP_FPS, 30)
+        # Keep the driver queue short so grab() returns the newest frame
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def run(self):
+        """Start the synchronized capture loop."""
+        try:
+            for side, index in self.camera_indices.items():
+                cap = self._open(index)
+                if cap is None:
+                    self.error.emit(f"Failed to open camera {index}")
+                    return
+                self.caps[side] = cap
+
+            left_cap, right_cap = self.caps['left'], self.caps['right']
+            self.running = True
+            while self.running:
+                start = time.monotonic()
+
+                # Trigger both devices before decoding either frame
+                left_ok = left_cap.grab()
+                left_time = time.monotonic()
+                right_ok = right_cap.grab()
+                right_time = time.monotonic()
+                if not (left_ok and right_ok):
+                    self.error.emit("Error grabbing synchronized frames")
+                    break
+
+                left_ok, left_frame = left_cap.retrieve()
+                right_ok, right_frame = right_cap.retrieve()
+                left_transform = self.transforms.get('left')
+                if left_ok and left_transform is not None:
+                    left_frame = left_transform(left_frame)
+                right_transform = self.transforms.get('right')
+                if right_ok and right_transform is not None:
+                    right_frame = right_transform(right_frame)
+                if left_ok:
+                    self.pairer.push('left', left_time, left_frame)
+                if right_ok:
+                    self.pairer.push('right', right_time, right_frame)
+
+                pair = self.pairer.pop_pair()
+                while pair is not None:
+                    left_frame, right_frame, skew = pair
+                    self.frames_ready.emit(left_frame, right_frame, skew)
+                    self.skew_updated.emit(skew)
+                    pair = self.pairer.pop_pair()
+
+                # Pace the loop to the frame rate without drifting
+                remaining = self.frame_interval - (time.monotonic() - start)
+                if remaining > 0:
+                    self.msleep(int(remaining * 1000))
+
+        except Exception as e:
+            self.error.emit(f"Camera error: {str(e)}")
+        finally:
+            self._release()
+            self.running = False
+
+    def _release(self):
+        for cap in self.caps.values():
+            cap.release()
+        self.caps = {}
+
+    def get_skew(self):
+        """Return the last measured inter-camera skew in seconds."""
+        return self.pairer.last_skew
+
+    def stop(self):
+        """Stop the synchronized capture."""
+        self.running = False
+        self.wait()
+        self._release()
+
 class CameraManager:
     def __init__(self):
         self.available_cameras = self._get_available_cameras()
         self.active_cameras = {}
+        self.synchronized = None
+        # Processing stages per camera, kept across camera restarts
+        # Display-path stages get their own workers so side stages cannot starve them
+        self.executor = create_executor(name='frame-display')
+        self.branch_executor = create_executor(name='frame-branch')
+        self.pipelines = {}
+        # Per-camera capture transforms; calibrated cameras are undistorted by default
+        self.transforms = {}
 
     def _get_available_cameras(self):
         """Find all available cameras."""
-        available = []
-        for i in range(10):  # Check first 10 indexes
-            try:
-                cap = cv2.VideoCapture(i, cv2.CAP_DSHOW)
-                if cap.isOpened():
-                    available.append(i)
-                cap.release()
-            except Exception as e:
-                print(f"Error checking camera {i}: {e}")
-            finally:
-                if cap:
-                    cap.release()
-        return available
+        return probe_cameras()
 
     def start_camera(self, camera_id):
         """Start a camera stream."""
@@ -83,21 +252,76 @@ class CameraManager:
             self.stop_camera(camera_id)
         
         # Create and start new camera thread
-        camera_thread = CameraThread(camera_id)
+        pipeline = self.pipeline(camera_id)
+        camera_thread = CameraThread(camera_id, pipeline, self.transform(camera_id))
+        pipeline.on_output = lambda frame, meta: camera_thread.frame_ready.emit(frame)
         self.active_cameras[camera_id] = camera_thread
         camera_thread.start()
         return camera_thread
 
+    def transform(self, camera_id):
+        """The capture transform for a camera: one set explicitly, else its undistorter."""
+        if camera_id not in self.transforms:
+            undistorter = Undistorter.for_camera(camera_id)
+            if undistorter is not None:
+                logger.info("Undistorting camera %s with its calibration", camera_id)
+            self.transforms[camera_id] = undistorter
+        return self.transforms[camera_id]
+
+    def set_transform(self, camera_id, transform):
+        """Set (or clear with None) the capture transform, applied from the next start."""
+        self.transforms[camera_id] = transform
+
+    def pipeline(self, camera_id):
+        """Return the frame pipeline of a camera, to register stages on it."""
+        if camera_id not in self.pipelines:
+            self.pipelines[camera_id] = FramePipeline(self.executor, name=f"camera{camera_id}",
+                                                      branch_executor=self.branch_executor)
+        return self.pipelines[camera_id]
+
+    def pipeline_stats(self):
+        """Return {camera id: {stage name: stats}} for pipelines with stages."""
+        return {camera_id: pipeline.stage_stats()
+                for camera_id, pipeline in self.pipelines.items() if pipeline.stages}
+
     def stop_camera(self, camera_id):
         """Stop a camera stream."""
         if camera_id in self.active_cameras:
             self.active_cameras[camera_id].stop()
             del self.active_cameras[camera_id]
 
+    def start_synchronized(self, left_id, right_id):
+        """Start a synchronized stereo capture on two cameras."""
+        # A device can only be opened once, stop any free-running streams
+        self.stop_camera(left_id)
+        self.stop_camera(right_id)
+        self.stop_synchronized()
+
+        self.synchronized = SynchronizedCameraThread(
+            left_id, right_id,
+            transforms={'left': self.transform(left_id), 'right': self.transform(right_id)})
+        self.synchronized.start()
+        return self.synchronized
+
+    def stop_synchronized(self):
+        """Stop the synchronized stereo capture."""
+        if self.synchronized:
+            self.synchronized.stop()
+            self.synchronized = None
+
     def stop_all_cameras(self):
         """Stop all active camera streams."""
         for camera_id in list(self.active_cameras.keys()):
             self.stop_camera(camera_id)
+        self.stop_synchronized()
+
+    def close(self):
+        """Stop all streams, close every stage and shut down the worker pools."""
+        self.stop_all_cameras()
+        self.executor.shutdown(wait=True)
+        self.branch_executor.shutdown(wait=True)
+        for pipeline in self.pipelines.values():
+            pipeline.close()
 
     def get_available_cameras(self):
         """Return list of available camera indices."""
@@ -0,0 +1,22 @@
+import logging
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+
+def probe_cameras(max_index=10, backend=cv2.CAP_DSHOW):
+    """Find all available cameras."""
+    available = []
+    for i in range(max_index):  # Check first 10 indexes
+        cap = None
+        try:
+            cap = cv2.VideoCapture(i, backend)
+            if cap.isOpened():
+                available.append(i)
+        except Exception as e:
+            logger.warning("Error checking camera %d: %s", i, e)
+        finally:
+            if cap:
+                cap.release()
+    return available
@@ -0,0 +1,487 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    tomllib = None
+
+logger = logging.getLogger(__name__)
+
+SERVO_NAMES = ('base', 'shoulder', 'elbow', 'gripper')
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+
+
+class ConfigError(ValueError):
+    """Raised when a configuration file is missing values or inconsistent."""
+
+
+@dataclass(frozen=True)
+class ServoConfig:
+    name: str
+    channel: int
+    min_angle: float
+    max_angle: float
+    home: float
+
+
+@dataclass(frozen=True)
+class AxisMapping:
+    axis: int
+    invert: bool = False
+
+
+@dataclass(frozen=True)
+class DeviceMapping:
+    match: str  # case-insensitive substring of the device name
+    axes: Dict[str, AxisMapping]
+    gripper_close_axis: int = -1  # -1 when the device has no gripper axes
+    gripper_open_axis: int = -1
+    deadzone: Optional[float] = None
+    expo: Optional[float] = None
+    stick_pairs: Tuple[Tuple[int, int], ...] = ()
+
+
+@dataclass(frozen=True)
+class InputConfig:
+    deadzone: float = 0.1
+    speed_multiplier: float = 5.0
+    update_rate: int = 50  # milliseconds
+    axes: Dict[str, AxisMapping] = field(default_factory=dict)
+    gripper_close_axis: int = 4
+    gripper_open_axis: int = 5
+    teach_button: int = 0
+    stale_timeout: float = 0.5  # seconds of stalled polling before holding, 0 to disable
+    devices: Tuple[DeviceMapping, ...] = ()
+    # Conditioning: radial deadzone over stick axis pairs, expo curve and
+    # one-euro filter (cutoffs in Hz) on the joint demands
+    stick_pairs: Tuple[Tuple[int, int], ...] = ((0, 1), (2, 3))
+    expo: float = 0.0
+    filter_min_cutoff: float = 1.5
+    filter_beta: float = 0.5
+    filter_d_cutoff: float = 1.0
+
+
+@dataclass(frozen=True)
+class WatchdogConfig:
+    enabled: bool = True
+    action: str = 'limp'  # 'hold' or 'limp'
+    deadline: float = 0.5  # seconds without a heartbeat before acting
+    check_interval: float = 0.01
+    maestro_serial_timeout_ms: int = 0  # 0 leaves the device setting alone
+
+
+@dataclass(frozen=True)
+class ThermalConfig:
+    enabled: bool = True
+    time_constant: float = 120.0  # seconds
+    stall_rise: float = 80.0  # degrees C above ambient at continuous stall
+    max_rise: float = 40.0  # budget, degrees C above ambient
+    resume_fraction: float = 0.8  # of max_rise before a tripped joint may load again
+    payload: float = 20.0  # grams held by the gripper
+    grip_contact: float = 110.0  # gripper angle where it starts pressing on the object
+    park: Optional[Dict[str, float]] = None  # None parks at the lowest-load pose
+
+
+@dataclass(frozen=True)
+class LoggingConfig:
+    level: str = 'INFO'
+    modules: Dict[str, str] = field(default_factory=dict)
+    debug_rate_limit: float = 20.0  # DEBUG records per second per call site, 0 = unlimited
+    binary_log: Optional[str] = None  # path of the binary event log, None = off
+
+
+@dataclass(frozen=True)
+class ArmProfile:
+    name: str
+    port: str
+    device_number: int
+    servo_min: int
+    servo_max: int
+    servos: Dict[str, ServoConfig]
+    input: InputConfig
+    watchdog: WatchdogConfig = field(default_factory=WatchdogConfig)
+    thermal: ThermalConfig = field(default_factory=ThermalConfig)
+
+
+class InputMap:
+    """Compiled axis mapping for one kind of input device."""
+    __slots__ = ('match', 'axis_map', 'gripper_axes', 'deadzone', 'expo', 'stick_pairs')
+
+    def __init__(self, match, axes, gripper_close_axis, gripper_open_axis, deadzone,
+                 expo=0.0, stick_pairs=()):
+        self.match = match.lower()
+        # (joint index, axis, sign) for each stick-driven joint
+        self.axis_map = tuple(
+            (SERVO_NAMES.index(name), mapping.axis, -1.0 if mapping.invert else 1.0)
+            for name, mapping in axes.items()
+        )
+        if gripper_close_axis < 0 or gripper_open_axis < 0:
+            self.gripper_axes = None
+        else:
+            self.gripper_axes = (gripper_close_axis, gripper_open_axis)
+        self.deadzone = deadzone
+        self.expo = expo
+        self.stick_pairs = tuple(tuple(pair) for pair in stick_pairs)
+
+    def matches(self, device_name):
+        return self.match in device_name.lower()
+
+
+class CompiledProfile:
+    """
+    Flat, tuple-based view of an ArmProfile for the control loop.
+    Every per-joint value is indexed in SERVO_NAMES order.
+    """
+    __slots__ = ('name', 'port', 'device_number', 'names', 'channels',
+                 'lower', 'upper', 'home', 'servo_min', 'servo_max',
+                 'target_scale', 'speed_multiplier', 'update_rate', 'teach_button',
+                 'stale_timeout', 'device_maps', 'filter_min_cutoff', 'filter_beta', 'filter_d_cutoff', 'watchdog', 'thermal')
+
+    def __init__(self, profile):
+        servos = [profile.servos[name] for name in SERVO_NAMES]
+        self.name = profile.name
+        self.port = profile.port
+        self.device_number = profile.device_number
+        self.names = SERVO_NAMES
+        self.channels = tuple(servo.channel for servo in servos)
+        self.lower = tuple(servo.min_angle for servo in servos)
+        self.upper = tuple(servo.max_angle for servo in servos)
+        self.home = tuple(servo.home for servo in servos)
+        self.servo_min = profile.servo_min
+        self.servo_max = profile.servo_max
+        # Quarter-microseconds per degree, so target = servo_min + angle * scale
+        self.target_scale = (profile.servo_max - profile.servo_min) / 180.0
+        self.speed_multiplier = profile.input.speed_multiplier
+        self.update_rate = profile.input.update_rate
+        self.teach_button = profile.input.teach_button
+        self.stale_timeout = profile.input.stale_timeout
+        # First matching map wins; the profile's own mapping matches any device
+        inputs = profile.input
+        self.device_maps = tuple(
+            InputMap(device.match, device.axes, device.gripper_close_axis,
+                     device.gripper_open_axis,
+                     inputs.deadzone if device.deadzone is None else device.deadzone,
+                     inputs.expo if device.expo is None else device.expo,
+                     device.stick_pairs)
+            for device in inputs.devices
+        ) + (InputMap('', inputs.axes, inputs.gripper_close_axis, inputs.gripper_open_axis,
+                      inputs.deadzone, inputs.expo, inputs.stick_pairs),)
+        self.filter_min_cutoff = inputs.filter_min_cutoff
+        self.filter_beta = inputs.filter_beta
+        self.filter_d_cutoff = inputs.filter_d_cutoff
+        self.watchdog = profile.watchdog
+        self.thermal = profile.thermal
+
+    def input_map_for(self, device_name):
+        """Return the InputMap to use for a device name."""
+        for input_map in self.device_maps:
+            if input_map.matches(device_name):
+                return input_map
+        return self.device_maps[-1]
+
+
+def _require(data, key, context):
+    if key not in data:
+        raise ConfigError(f"Missing '{key}' in {context}")
+    return data[key]
+
+
+def _parse_servo(name, data, context):
+    context = f"{context}.servos.{name}"
+    servo = ServoConfig(
+        name=name,
+        channel=int(_require(data, 'channel', context)),
+        min_angle=float(_require(data, 'min', context)),
+        max_angle=float(_require(data, 'max', context)),
+        home=float(data.get('home', 90)),
+    )
+    if not 0 <= servo.channel <= 23:
+        raise ConfigError(f"{context}: channel {servo.channel} out of range")
+    if servo.min_angle >= servo.max_angle:
+        raise ConfigError(f"{context}: min must be below max")
+    if not servo.min_angle <= servo.home <= servo.max_angle:
+        raise ConfigError(f"{context}: home {servo.home} outside limits")
+    return servo
+
+
+def _parse_axis(value, context, optional=False):
+    """
+    Axis index as an int. Negative indices would silently pick axes from
+    the end of the axis array, so only `optional` axes may be -1 (none).
+    """
+    axis = int(value)
+    if axis < (-1 if optional else 0):
+        raise ConfigError(f"{context}: axis index must not be negative"
+                          + (" (use -1 for none)" if optional else ""))
+    return axis
+
+
+def _parse_axes(data, context):
+    axes = {}
+    for name, mapping in data.get('axes', {}).items():
+        if name not in SERVO_NAMES:
+            raise ConfigError(f"{context}: unknown servo '{name}' in axes")
+        axis_context = f"{context}.axes.{name}"
+        axes[name] = AxisMapping(axis=_parse_axis(_require(mapping, 'axis', axis_context), axis_context),
+                                 invert=bool(mapping.get('invert', False)))
+    return axes
+
+
+def _parse_stick_pairs(pairs, context):
+    try:
+        pairs = tuple((int(x), int(y)) for x, y in pairs)
+    except (TypeError, ValueError):
+        raise ConfigError(f"{context}: stick_pairs must be a list of [x, y] axis pairs")
+    if any(axis < 0 for pair in pairs for axis in pair):
+        raise ConfigError(f"{context}: stick_pairs axis indices must not be negative")
+    return pairs
+
+
+def _parse_device(index, data, context):
+    context = f"{context}.devices[{index}]"
+    deadzone = data.get('deadzone')
+    expo = data.get('expo')
+    device = DeviceMapping(
+        match=str(_require(data, 'match', context)),
+        axes=_parse_axes(data, context),
+        gripper_close_axis=_parse_axis(data.get('gripper_close_axis', -1),
+                                       f"{context}.gripper_close_axis", optional=True),
+        gripper_open_axis=_parse_axis(data.get('gripper_open_axis', -1),
+                                      f"{context}.gripper_open_axis", optional=True),
+        deadzone=None if deadzone is None else float(deadzone),
+        expo=None if expo is None else float(expo),
+        stick_pairs=_parse_stick_pairs(data.get('stick_pairs', []), context),
+    )
+    if device.deadzone is not None and not 0 <= device.deadzone < 1:
+        raise ConfigError(f"{context}: deadzone must be in [0, 1)")
+    if device.expo is not None and not 0 <= device.expo <= 1:
+        raise ConfigError(f"{context}: expo must be in [0, 1]")
+    return device
+
+
+def _parse_input(data, context):
+    context = f"{context}.input"
+    axes = _parse_axes(data, context)
+    config = InputConfig(
+        deadzone=float(data.get('deadzone', 0.1)),
+        speed_multiplier=float(data.get('speed_multiplier', 5.0)),
+        update_rate=int(data.get('update_rate', 50)),
+        axes=axes,
+        gripper_close_axis=_parse_axis(data.get('gripper_close_axis', 4),
+                                       f"{context}.gripper_close_axis", optional=True),
+        gripper_open_axis=_parse_axis(data.get('gripper_open_axis', 5),
+                                      f"{context}.gripper_open_axis", optional=True),
+        teach_button=int(data.get('teach_button', 0)),
+        stale_timeout=float(data.get('stale_timeout', 0.5)),
+        devices=tuple(_parse_device(i, device, context)
+                      for i, device in enumerate(data.get('devices', []))),
+        stick_pairs=_parse_stick_pairs(data.get('stick_pairs', [[0, 1], [2, 3]]), context),
+        expo=float(data.get('expo', 0.0)),
+        filter_min_cutoff=float(data.get('filter_min_cutoff', 1.5)),
+        filter_beta=float(data.get('filter_beta', 0.5)),
+        filter_d_cutoff=float(data.get('filter_d_cutoff', 1.0)),
+    )
+    if not 0 <= config.deadzone < 1:
+        raise ConfigError(f"{context}: deadzone must be in [0, 1)")
+    if config.speed_multiplier <= 0:
+        raise ConfigError(f"{context}: speed_multiplier must be positive")
+    if config.update_rate <= 0:
+        raise ConfigError(f"{context}: update_rate must be positive")
+    if config.stale_timeout < 0:
+        raise ConfigError(f"{context}: stale_timeout must not be negative")
+    if not 0 <= config.expo <= 1:
+        raise ConfigError(f"{context}: expo must be in [0, 1]")
+    if config.filter_min_cutoff <= 0 or config.filter_d_cutoff <= 0 or config.filter_beta < 0:
+        raise ConfigError(f"{context}: filter cutoffs must be positive and beta non-negative")
+    return config
+
+
+def _parse_watchdog(data, context):
+    context = f"{context}.watchdog"
+    config = WatchdogConfig(
+        enabled=bool(data.get('enabled', True)),
+        action=str(data.get('action', 'limp')),
+        deadline=float(data.get('deadline', 0.5)),
+        check_interval=float(data.get('check_interval', 0.01)),
+        maestro_serial_timeout_ms=int(data.get('maestro_serial_timeout_ms', 0)),
+    )
+    if config.action not in ('hold', 'limp'):
+        raise ConfigError(f"{context}: action must be 'hold' or 'limp'")
+    if not 0 < config.check_interval < config.deadline:
+        raise ConfigError(f"{context}: check_interval must be positive and below deadline")
+    if not 0 <= config.maestro_serial_timeout_ms <= 655350:
+        raise ConfigError(f"{context}: maestro_serial_timeout_ms out of range")
+    return config
+
+
+def _parse_thermal(data, context):
+    context = f"{context}.thermal"
+    park = data.get('park')
+    if park is not None:
+        unknown = set(park) - set(SERVO_NAMES)
+        if unknown:
+            raise ConfigError(f"{context}.park: unknown servos {', '.join(sorted(unknown))}")
+        park = {name: float(angle) for name, angle in park.items()}
+    config = ThermalConfig(
+        enabled=bool(data.get('enabled', True)),
+        time_constant=float(data.get('time_constant', 120.0)),
+        stall_rise=float(data.get('stall_rise', 80.0)),
+        max_rise=float(data.get('max_rise', 40.0)),
+        resume_fraction=float(data.get('resume_fraction', 0.8)),
+        payload=float(data.get('payload', 20.0)),
+        grip_contact=float(data.get('grip_contact', 110.0)),
+        park=park,
+    )
+    if config.time_constant <= 0 or config.stall_rise <= 0 or config.max_rise <= 0:
+        raise ConfigError(f"{context}: time_constant, stall_rise and max_rise must be positive")
+    if not 0 < config.resume_fraction < 1:
+        raise ConfigError(f"{context}: resume_fraction must be between 0 and 1")
+    if config.payload < 0:
+        raise ConfigError(f"{context}: payload must not be negative")
+    return config
+
+
+def parse_profile(name, data):
+    """Validate a profile dict and build an ArmProfile."""
+    context = f"profiles.{name}"
+    servos_data = _require(data, 'servos', context)
+    servos = {}
+    for servo_name in SERVO_NAMES:
+        servos[servo_name] = _parse_servo(
+            servo_name, _require(servos_data, servo_name, f"{context}.servos"), context)
+
+    channels = [servo.channel for servo in servos.values()]
+    if len(set(channels)) != len(channels):
+        raise ConfigError(f"{context}: servo channels must be unique")
+
+    profile = ArmProfile(
+        name=name,
+        port=str(_require(data, 'port', context)),
+        device_number=int(data.get('device_number', 0x0C)),
+        servo_min=int(data.get('servo_min', 2000)),
+        servo_max=int(data.get('servo_max', 10000)),
+        servos=servos,
+        input=_parse_input(data.get('input', {}), context),
+        watchdog=_parse_watchdog(data.get('watchdog', {}), context),
+        thermal=_parse_thermal(data.get('thermal', {}), context),
+    )
+    if not 0 < profile.servo_min < profile.servo_max <= 16383:
+        raise ConfigError(f"{context}: servo_min/servo_max out of range")
+    return profile
+
+
+def load_file(path):
+    """Read a JSON or TOML configuration file into a dict."""
+    if path.endswith('.toml'):
+        if tomllib is None:
+            raise ConfigError("TOML configuration requires Python 3.11 or newer")
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ConfigStore:
+    """
+    Lazily loaded configuration with change detection.
+
+    The file is only read the first time `compiled` is accessed. Call
+    check_for_changes() periodically (e.g. from a QTimer) to pick up edits;
+    listeners are called with the new CompiledProfile after a successful reload.
+    An invalid edit is reported and the previous configuration is kept.
+    """
+
+    def __init__(self, path=DEFAULT_CONFIG_PATH, profile=None):
+        self.path = path
+        self.profile_name = profile
+        self.profile = None
+        self._compiled = None
+        self._mtime = None
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[CompiledProfile], None]] = []
+
+    @property
+    def compiled(self) -> CompiledProfile:
+        if self._compiled is None:
+            with self._lock:
+                if self._compiled is None:
+                    self._load()
+        return self._compiled
+
+    def _stat(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self):
+        mtime = self._stat()
+        data = load_file(self.path)
+        name = self.profile_name or data.get('default_profile')
+        profiles = _require(data, 'profiles', self.path)
+        if name not in profiles:
+            raise ConfigError(f"Profile '{name}' not found in {self.path}")
+        profile = parse_profile(name, profiles[name])
+        # Swap in a fully built object so readers never see a partial update
+        self.profile = profile
+        self._compiled = CompiledProfile(profile)
+        self._mtime = mtime
+
+    def add_listener(self, callback):
+        """Register a callback(CompiledProfile) for configuration reloads."""
+        self._listeners.append(callback)
+
+    def check_for_changes(self):
+        """Reload the file if it changed on disk. Returns True on reload."""
+        mtime = self._stat()
+        if mtime is None or mtime == self._mtime:
+            return False
+        with self._lock:
+            try:
+                self._load()
+            except (ConfigError, ValueError, TypeError, OSError) as e:
+                # Remember the bad version so it is not re-parsed every poll
+                self._mtime = mtime
+                logger.error("Error reloading configuration: %s", e)
+                return False
+        compiled = self._compiled
+        for callback in self._listeners:
+            callback(compiled)
+        return True
+
+
+def parse_logging(data):
+    """Validate the top-level 'logging' section."""
+    levels = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+    config = LoggingConfig(
+        level=str(data.get('level', 'INFO')).upper(),
+        modules={name: str(level).upper() for name, level in data.get('modules', {}).items()},
+        debug_rate_limit=float(data.get('debug_rate_limit', 20.0)),
+        binary_log=data.get('binary_log'),
+    )
+    for name, level in [('logging.level', config.level)] + [
+            (f"logging.modules.{name}", level) for name, level in config.modules.items()]:
+        if level not in levels:
+            raise ConfigError(f"{name}: unknown level '{level}'")
+    if config.debug_rate_limit < 0:
+        raise ConfigError("logging.debug_rate_limit must not be negative")
+    return config
+
+
+def load_logging_config(path=DEFAULT_CONFIG_PATH):
+    """Read the logging settings, falling back to defaults if the file has none."""
+    try:
+        data = load_file(path)
+    except OSError:
+        return LoggingConfig()
+    return parse_logging(data.get('logging', {}))
+
+
+def available_profiles(path=DEFAULT_CONFIG_PATH):
+    """Return the profile names defined in a configuration file."""
+    return list(load_file(path).get('profiles', {}).keys())
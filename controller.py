@@ -1,55 +1,214 @@
+import logging
+
+import numpy as np
 import pygame
 from PyQt5.QtCore import QObject, pyqtSignal, QTimer
 import time
 
+from config import SERVO_NAMES, AxisMapping, InputMap
+from input_conditioning import AxisConditioner, RateIntegrator
+import log_setup
+
+logger = logging.getLogger(__name__)
+
+# PS4 Controller axis mapping:
+# 0: Left stick horizontal (left: -1, right: 1)
+# 1: Left stick vertical (up: -1, down: 1)
+# 2: Right stick horizontal (left: -1, right: 1)
+# 3: Right stick vertical (up: -1, down: 1)
+# 4: L2 trigger (-1 to 1)
+# 5: R2 trigger (-1 to 1)
+# Default: base on left X (inverted), shoulder on right Y, elbow on left Y.
+# Used until a profile is applied.
+DEFAULT_INPUT_MAP = InputMap('', {
+    'base': AxisMapping(0, invert=True),
+    'shoulder': AxisMapping(3),
+    'elbow': AxisMapping(1),
+}, 4, 5, 0.1, stick_pairs=((0, 1), (2, 3)))
+
+# The speed multiplier used to be degrees per 50 ms poll; keep that feel
+# by scaling it to degrees per second at the original poll rate.
+DEGREES_PER_SECOND_PER_MULTIPLIER = 1000.0 / 50
+
+
+class InputDevice:
+    """One attached joystick-class HID device and its axis mapping."""
+
+    def __init__(self, joystick, input_map):
+        self.joystick = joystick
+        self.instance_id = joystick.get_instance_id()
+        self.name = joystick.get_name()
+        self.num_axes = joystick.get_numaxes()
+        self.axes = np.zeros(self.num_axes)
+        self.button_data = {}
+        self.set_input_map(input_map)
+
+    def set_input_map(self, input_map):
+        self.input_map = input_map
+        self.conditioner = AxisConditioner(input_map, len(SERVO_NAMES))
+
+    @property
+    def axis_data(self):
+        return {axis: round(float(value), 2) for axis, value in enumerate(self.axes)}
+
+    def poll(self):
+        """Read the current axis state. Raises pygame.error if the device is gone."""
+        get_axis = self.joystick.get_axis
+        axes = self.axes
+        for axis in range(self.num_axes):
+            axes[axis] = get_axis(axis)
+
+    def demands(self):
+        """Return conditioned -1..1 demands per joint in SERVO_NAMES order."""
+        return self.conditioner(self.axes)
+
+    def log_info(self):
+        """Log information about the device."""
+        logger.info("Controller info: name=%s axes=%d buttons=%d hats=%d",
+                    self.name, self.num_axes, self.joystick.get_numbuttons(),
+                    self.joystick.get_numhats())
+
+
 class PS4Controller(QObject):
+    """
+    Joystick input for the arm.
+
+    Despite the name, any number of pygame joystick devices (PS4 pads,
+    generic gamepads, a SpaceMouse) can be attached at once. Devices are
+    added and removed from JOYDEVICEADDED/JOYDEVICEREMOVED events while
+    polling runs, so a pad that drops over Bluetooth reconnects by itself.
+    Each device uses the first matching InputMap of the profile. A device
+    that is no longer enumerated by pygame is dropped even if its removal
+    event never arrives. If no device is attached or the poll loop stalls
+    for more than `stale_timeout` seconds (0 disables the check), controls
+    are held at zero. A stick held still, even at full deflection, keeps
+    its demand: an unchanged axis value does not mean the device is gone.
+    """
     control_updated = pyqtSignal(dict)
+    button_pressed = pyqtSignal(int)
+    devices_changed = pyqtSignal(list)
+    input_stale = pyqtSignal(bool)
 
-    def __init__(self):
+    def __init__(self, profile=None):
         super().__init__()
         pygame.init()
         pygame.joystick.init()
-        
-        self.controller = None
-        self.axis_data = {}
-        self.button_data = {}
+
+        self.devices = {}
         self.running = False
-        
-        # Initialize controller if available
-        self.connect()
-        
+        self.stale = True
+        self.last_poll = None
+        self.profile = None
+
         # Control settings
         self.speed_multiplier = 5.0  # Increased from 2 to 5 degrees per update
         self.update_rate = 50  # milliseconds
-        
+        self.stale_timeout = 0.5  # seconds
+        self.integrator = RateIntegrator(len(SERVO_NAMES), min_cutoff=1.5, beta=0.5)
+        self.dt = 0.0
+
         # Setup timer for polling
         self.timer = QTimer()
         self.timer.timeout.connect(self._update_loop)
-        
+
+        if profile is not None:
+            self.apply_profile(profile)
+
+        # Pick up devices that are already attached
+        self.connect()
+
+    @property
+    def controller(self):
+        """The first attached device's joystick, or None."""
+        for device in self.devices.values():
+            return device.joystick
+        return None
+
+    @property
+    def axis_data(self):
+        """Axis state of the first attached device."""
+        for device in self.devices.values():
+            return device.axis_data
+        return {}
+
+    def apply_profile(self, profile):
+        """
+        Apply input mappings and rates from a CompiledProfile. On a reload
+        only settings that changed are applied, so a speed set with
+        set_speed_multiplier() and the filter state survive unrelated edits.
+        """
+        previous = self.profile
+        self.profile = profile
+        if previous is None or profile.speed_multiplier != previous.speed_multiplier:
+            self.speed_multiplier = profile.speed_multiplier
+        self.update_rate = profile.update_rate
+        self.stale_timeout = profile.stale_timeout
+        for device in self.devices.values():
+            device.set_input_map(self._input_map_for(device.name))
+        filter_settings = (profile.filter_min_cutoff, profile.filter_beta, profile.filter_d_cutoff)
+        if previous is None or filter_settings != (previous.filter_min_cutoff, previous.filter_beta,
+                                                   previous.filter_d_cutoff):
+            self.integrator = RateIntegrator(len(SERVO_NAMES), *filter_settings)
+        if self.timer.isActive() and self.timer.interval() != self.update_rate:
+            self.timer.setInterval(self.update_rate)
+
+    def _input_map_for(self, name):
+        if self.profile is None:
+            return DEFAULT_INPUT_MAP
+        return self.profile.input_map_for(name)
+
     def connect(self):
-        """Connect to the first available controller."""
+        """Open every joystick that is currently attached. Returns True if any."""
+        for index in range(pygame.joystick.get_count()):
+            self._add_device(index)
+        if not self.devices:
+            logger.info("No controller found, waiting for one to be connected")
+        return bool(self.devices)
+
+    def _add_device(self, device_index):
+        try:
+            joystick = pygame.joystick.Joystick(device_index)
+            joystick.init()
+        except pygame.error as e:
+            logger.warning("Error opening controller %d: %s", device_index, e)
+            return
+        if joystick.get_instance_id() in self.devices:
+            return
+        device = InputDevice(joystick, self._input_map_for(joystick.get_name()))
+        self.devices[device.instance_id] = device
+        logger.info("Controller connected: %s", device.name)
+        device.log_info()
+        self.devices_changed.emit([d.name for d in self.devices.values()])
+
+    def _remove_device(self, instance_id):
+        device = self.devices.pop(instance_id, None)
+        if device is None:
+            return
+        logger.info("Controller disconnected: %s", device.name)
         try:
-            self.controller = pygame.joystick.Joystick(0)
-            self.controller.init()
-            print("PS4 Controller connected")
-            self._print_controller_info()
-            return True
+            device.joystick.quit()
         except pygame.error:
-            print("No PS4 controller found")
-            return False
+            pass
+        self.devices_changed.emit([d.name for d in self.devices.values()])
 
-    def _print_controller_info(self):
-        """Print information about the connected controller."""
-        print(f"\nController Info:")
-        print(f"Name: {self.controller.get_name()}")
-        print(f"Number of axes: {self.controller.get_numaxes()}")
-        print(f"Number of buttons: {self.controller.get_numbuttons()}")
-        print(f"Number of hats: {self.controller.get_numhats()}\n")
+    def _drop_missing_devices(self):
+        """Remove devices pygame no longer enumerates, as after a silent Bluetooth dropout."""
+        attached = set()
+        for index in range(pygame.joystick.get_count()):
+            try:
+                attached.add(pygame.joystick.Joystick(index).get_instance_id())
+            except pygame.error:
+                pass
+        for instance_id in list(self.devices):
+            if instance_id not in attached:
+                logger.warning("%s is no longer enumerated", self.devices[instance_id].name)
+                self._remove_device(instance_id)
 
     def start(self):
-        """Start controller polling."""
-        if not self.running and self.controller:
+        """Start controller polling. Devices may be connected later."""
+        if not self.running:
             self.running = True
+            self.last_poll = None
             self.timer.start(self.update_rate)
 
     def stop(self):
@@ -57,43 +216,84 @@ class PS4Controller(QObject):
         self.running = False
         self.timer.stop()
 
+    def _set_stale(self, stale):
+        if stale != self.stale:
+            self.stale = stale
+            # Resume from rest instead of from the filter state before the hold
+            self.integrator.reset()
+            if stale:
+                logger.warning("Controller input stale, holding position")
+            else:
+                logger.info("Controller input resumed")
+            self.input_stale.emit(stale)
+
     def _update_loop(self):
         """Main controller update loop."""
         if not self.running:
             return
-            
+
+        now = time.monotonic()
+        # A stalled poll loop means the axis state is old: hold this tick
+        self.dt = 0.0 if self.last_poll is None else now - self.last_poll
+        stalled = 0 < self.stale_timeout < self.dt
+        self.last_poll = now
+
         for event in pygame.event.get():
-            if event.type == pygame.JOYAXISMOTION:
-                self.axis_data[event.axis] = round(event.value, 2)
-                print(f"Axis {event.axis} value: {event.value}")
+            device = self.devices.get(getattr(event, 'instance_id', None))
+            if event.type == pygame.JOYDEVICEADDED:
+                self._add_device(event.device_index)
+            elif event.type == pygame.JOYDEVICEREMOVED:
+                self._remove_device(event.instance_id)
             elif event.type == pygame.JOYBUTTONDOWN:
-                self.button_data[event.button] = True
-                print(f"Button {event.button} pressed")
+                if device is not None:
+                    device.button_data[event.button] = True
+                logger.debug("Button %d pressed", event.button)
+                self.button_pressed.emit(event.button)
             elif event.type == pygame.JOYBUTTONUP:
-                self.button_data[event.button] = False
-                print(f"Button {event.button} released")
-        
-        # Get and print control changes
+                if device is not None:
+                    device.button_data[event.button] = False
+                logger.debug("Button %d released", event.button)
+
+        # The count only changes on hot-plug, so this is one call per tick
+        if pygame.joystick.get_count() < len(self.devices):
+            self._drop_missing_devices()
+
+        for instance_id, device in list(self.devices.items()):
+            try:
+                device.poll()
+            except pygame.error:
+                self._remove_device(instance_id)
+
+        self._set_stale(stalled or not self.devices)
+
+        # Get and log control changes; skip the scan entirely unless debugging
         changes = self.get_controls()
-        if any(abs(v) > 0.1 for v in changes.values()):
-            print(f"Control changes: {changes}")
-        
+        if logger.isEnabledFor(logging.DEBUG) and any(abs(v) > 0.1 for v in changes.values()):
+            logger.debug("Control changes: %s", changes)
+        binary_log = log_setup.binary_log
+        if binary_log is not None:
+            binary_log.log(binary_log.event_id('input.changes'), changes['base'],
+                           changes['shoulder'], changes['elbow'], changes['gripper'])
+
         # Emit control updates
         self.control_updated.emit(changes)
 
     def set_speed_multiplier(self, value):
         """Set the speed multiplier for servo movements."""
         self.speed_multiplier = max(0.1, min(20.0, float(value)))
-        print(f"Speed multiplier set to: {self.speed_multiplier}")
+        logger.info("Speed multiplier set to: %.1f", self.speed_multiplier)
 
     def get_speed_multiplier(self):
         """Get the current speed multiplier."""
         return self.speed_multiplier
 
-    def get_controls(self):
+    def get_controls(self, dt=None):
         """
         Get current control values for robot arm.
-        Returns dict with changes to apply to servo angles.
+        Returns dict with changes to apply to servo angles over the last
+        dt seconds (the measured poll interval by default), so the joint
+        speed in degrees per second does not depend on the poll rate.
+        Demands from all attached devices are added together.
         """
         changes = {
             'base': 0,
@@ -101,48 +301,23 @@ class PS4Controller(QObject):
             'elbow': 0,
             'gripper': 0
         }
-        
-        if not self.controller:
+
+        if self.stale or not self.devices:
             return changes
 
+        if dt is None:
+            dt = self.dt
         try:
-            # PS4 Controller axis mapping:
-            # 0: Left stick horizontal (left: -1, right: 1)
-            # 1: Left stick vertical (up: -1, down: 1)
-            # 2: Right stick horizontal (left: -1, right: 1)
-            # 3: Right stick vertical (up: -1, down: 1)
-            # 4: L2 trigger (-1 to 1)
-            # 5: R2 trigger (-1 to 1)
-
-            # Base rotation (left/right on left stick)
-            if 0 in self.axis_data:
-                if abs(self.axis_data[0]) > 0.1:  # Dead zone
-                    changes['base'] = self.speed_multiplier * -self.axis_data[0]
-
-            # Shoulder (up/down on right stick)
-            if 3 in self.axis_data:
-                if abs(self.axis_data[3]) > 0.1:
-                    changes['shoulder'] = self.speed_multiplier * self.axis_data[3]
-
-            # Elbow (up/down on left stick)
-            if 1 in self.axis_data:
-                if abs(self.axis_data[1]) > 0.1:
-                    changes['elbow'] = self.speed_multiplier * self.axis_data[1]
-
-            # Gripper (L2/R2 triggers)
-            # L2 closes (-1 to 1), R2 opens (-1 to 1)
-            l2 = self.axis_data.get(4, -1)  # Default to -1 when not pressed
-            r2 = self.axis_data.get(5, -1)  # Default to -1 when not pressed
-            
-            # Map from -1,1 to 0,1 range
-            l2_mapped = (l2 + 1) / 2
-            r2_mapped = (r2 + 1) / 2
-            
-            gripper_change = (r2_mapped - l2_mapped) * self.speed_multiplier
-            changes['gripper'] = gripper_change
-
-        except Exception as e:
-            print(f"Error in get_controls: {e}")
-            print(f"Current axis_data: {self.axis_data}")
-
-        return changes 
\ No newline at end of file
+            demands = np.zeros(len(SERVO_NAMES))
+            for device in self.devices.values():
+                demands += device.demands()
+            # The integrator clamps the sum so several devices cannot exceed full speed
+            max_rate = self.speed_multiplier * DEGREES_PER_SECOND_PER_MULTIPLIER
+            deltas = self.integrator(demands, max_rate, dt)
+            for joint, servo_name in enumerate(SERVO_NAMES):
+                changes[servo_name] = float(deltas[joint])
+
+        except Exception:
+            logger.exception("Error in get_controls, axis_data: %s", self.axis_data)
+
+        return changes
@@ -0,0 +1,298 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """
+    One step of a frame pipeline.
+
+    Subclasses override process(frame, meta), which runs on a pool worker
+    and returns the frame to pass on (None drops it). A stage with
+    `branch = True` (recording, streaming, detection) gets the frame as a
+    side output and never holds up later stages or the display; other
+    stages transform the frame on its way to the display. `parallelism` is
+    how many frames the stage may work on at once; a frame arriving while
+    all of them are busy is skipped by this stage.
+
+    Frames are shared between stages and marked read-only: a stage that
+    changes the image must return a new array (or work on frame.copy()).
+    """
+    name = 'stage'
+    branch = False
+    parallelism = 1
+
+    def process(self, frame, meta):
+        return frame
+
+    def close(self):
+        pass
+
+
+class FunctionStage(Stage):
+    """Wrap a plain function(frame, meta) as a stage."""
+
+    def __init__(self, name, function, branch=False, parallelism=1):
+        self.name = name
+        self.function = function
+        self.branch = branch
+        self.parallelism = parallelism
+
+    def process(self, frame, meta):
+        return self.function(frame, meta)
+
+
+class CropStage(Stage):
+    """Crop every frame to an (x, y, width, height) region of interest."""
+    name = 'crop'
+
+    def __init__(self, x, y, width, height):
+        self.region = (x, y, width, height)
+
+    def process(self, frame, meta):
+        x, y, width, height = self.region
+        return frame[y:y + height, x:x + width]
+
+
+class RecordStage(Stage):
+    """Write frames to a video file as a side output."""
+    name = 'record'
+    branch = True
+
+    def __init__(self, path, fps=30.0, fourcc='MJPG'):
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.writer = None
+        self._lock = threading.Lock()
+
+    def process(self, frame, meta):
+        import cv2
+
+        with self._lock:
+            if self.writer is None:
+                height, width = frame.shape[:2]
+                self.writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*self.fourcc),
+                                              self.fps, (width, height))
+            self.writer.write(frame)
+        return frame
+
+    def close(self):
+        with self._lock:
+            if self.writer is not None:
+                self.writer.release()
+                self.writer = None
+
+
+class StageStats:
+    """Counters and recent timings for one stage."""
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.busy = 0
+        self.latencies = deque(maxlen=100)
+        self.completions = deque()
+
+    def finished(self, latency, now):
+        self.processed += 1
+        self.latencies.append(latency)
+        self.completions.append(now)
+        while self.completions and now - self.completions[0] > self.window:
+            self.completions.popleft()
+
+    def snapshot(self, now=None):
+        now = time.monotonic() if now is None else now
+        recent = [t for t in self.completions if now - t <= self.window]
+        latencies = list(self.latencies)
+        return {
+            'processed': self.processed,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'fps': len(recent) / self.window,
+            'latency_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            'max_latency_ms': max(latencies) * 1000 if latencies else 0.0,
+        }
+
+
+class FramePipeline:
+    """
+    Ordered stages for one camera, run on bounded worker pools.
+
+    submit() is called by the capture thread and never blocks: each frame
+    is handed to the first stage, and every finished transform stage hands
+    its result to the next. Transform stages run on `executor`, branch
+    stages on `branch_executor`, so slow branches cannot occupy the workers
+    the display path needs; at most `branch_limit` branch frames of this
+    pipeline are in flight, further ones are skipped. Frames that finish
+    after a newer frame was already delivered are dropped so the output
+    never goes back in time. Finished frames go to `on_output(frame, meta)`
+    on a pool worker thread; with no transform stages they are delivered
+    directly from submit().
+    """
+
+    def __init__(self, executor, on_output=None, name='camera', branch_executor=None,
+                 branch_limit=2):
+        self.executor = executor
+        self.branch_executor = executor if branch_executor is None else branch_executor
+        self.on_output = on_output
+        self.name = name
+        self.branch_limit = branch_limit
+        self.stages = []
+        self.stats = {}
+        self.late = 0
+        self._branches = 0
+        self._sequence = 0
+        self._last_delivered = -1
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage, index=None):
+        """Register a stage, at the end or at `index` in the chain."""
+        with self._lock:
+            if any(existing.name == stage.name for existing in self.stages):
+                raise ValueError(f"Pipeline '{self.name}' already has a stage named '{stage.name}'")
+            stages = list(self.stages)
+            stages.insert(len(stages) if index is None else index, stage)
+            self.stages = stages
+            self.stats[stage.name] = StageStats()
+        return stage
+
+    def remove_stage(self, name):
+        """Unregister and close a stage by name."""
+        with self._lock:
+            stage = next((stage for stage in self.stages if stage.name == name), None)
+            if stage is None:
+                return
+            self.stages = [existing for existing in self.stages if existing is not stage]
+            del self.stats[name]
+        stage.close()
+
+    def close(self):
+        for stage in list(self.stages):
+            self.remove_stage(stage.name)
+
+    def submit(self, frame, timestamp=None):
+        """Feed one captured frame into the pipeline."""
+        meta = {'timestamp': time.monotonic() if timestamp is None else timestamp,
+                'sequence': self._sequence}
+        self._sequence += 1
+        # The stage list is replaced, never mutated, so this snapshot stays valid
+        self._advance(frame, meta, self.stages, 0)
+
+    def _advance(self, frame, meta, stages, position):
+        # Every stage sees the same array, so nobody may change it in place
+        frame.flags.writeable = False
+        while position < len(stages):
+            stage = stages[position]
+            if not self._claim(stage):
+                if not stage.branch:
+                    return
+                position += 1
+                continue
+            if not stage.branch:
+                self.executor.submit(self._run, stage, frame, meta, stages, position)
+                return
+            self.branch_executor.submit(self._run, stage, frame, meta, stages, position)
+            position += 1
+        self._deliver(frame, meta)
+
+    def _claim(self, stage):
+        with self._lock:
+            stats = self.stats.get(stage.name)
+            if stats is None:
+                return False
+            if stats.busy >= stage.parallelism or (stage.branch and
+                                                   self._branches >= self.branch_limit):
+                stats.skipped += 1
+                return False
+            stats.busy += 1
+            if stage.branch:
+                self._branches += 1
+            return True
+
+    def _run(self, stage, frame, meta, stages, position):
+        start = time.monotonic()
+        try:
+            result = stage.process(frame, meta)
+        except Exception:
+            logger.exception("Stage '%s' of pipeline '%s' failed", stage.name, self.name)
+            result = None
+            failed = True
+        else:
+            failed = False
+        now = time.monotonic()
+        with self._lock:
+            if stage.branch:
+                self._branches -= 1
+            stats = self.stats.get(stage.name)
+            if stats is not None:
+                stats.busy -= 1
+                if failed:
+                    stats.failed += 1
+                else:
+                    stats.finished(now - start, now)
+        if not stage.branch and result is not None:
+            self._advance(result, meta, stages, position + 1)
+
+    def _deliver(self, frame, meta):
+        with self._lock:
+            if meta['sequence'] <= self._last_delivered:
+                self.late += 1
+                return
+            self._last_delivered = meta['sequence']
+        if self.on_output is not None:
+            self.on_output(frame, meta)
+
+    def stage_stats(self):
+        """Return {stage name: stats dict} for every registered stage."""
+        now = time.monotonic()
+        with self._lock:
+            return {name: stats.snapshot(now) for name, stats in self.stats.items()}
+
+
+def create_executor(max_workers=2, name='frame-stage'):
+    """A bounded worker pool for camera pipelines to share."""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+
+def benchmark_pipeline(frames=150, fps=30.0, sink_time=0.1):
+    """
+    Feed synthetic 640x480 frames at `fps` through a crop stage and a slow
+    branch stage that takes `sink_time` per frame, as a detector or encoder
+    might. Returns (display fps, crop stats, slow stage stats); the display
+    rate should stay at the capture rate while the slow stage skips frames.
+    """
+    executor = create_executor(name='frame-display')
+    branch_executor = create_executor(name='frame-branch')
+    delivered = []
+    pipeline = FramePipeline(executor, lambda frame, meta: delivered.append(time.monotonic()),
+                             name='bench', branch_executor=branch_executor)
+    pipeline.add_stage(CropStage(0, 0, 320, 240))
+    pipeline.add_stage(FunctionStage('slow', lambda frame, meta: time.sleep(sink_time), branch=True))
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    start = time.monotonic()
+    for i in range(frames):
+        pipeline.submit(frame)
+        remaining = start + (i + 1) / fps - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+    executor.shutdown(wait=True)
+    branch_executor.shutdown(wait=True)
+    stats = pipeline.stage_stats()
+    display_fps = (len(delivered) - 1) / (delivered[-1] - delivered[0]) if len(delivered) > 1 else 0.0
+    return display_fps, stats['crop'], stats['slow']
+
+
+if __name__ == "__main__":
+    # Same as `python -m robot_arm_control bench pipeline`
+    from robot_arm_control import main
+    raise SystemExit(main(['bench', 'pipeline']))
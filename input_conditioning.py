@@ -0,0 +1,185 @@
+import math
+import time
+
+import numpy as np
+
+
+def radial_deadzone(axes, pairs, deadzone):
+    """
+    Apply a radial deadzone to stick axis pairs in place.
+
+    For each (x, y) pair the deflection magnitude is rescaled from
+    [deadzone, 1] to [0, 1] while keeping its direction, so diagonals are
+    not cut off the way two independent axial deadzones would.
+    `pairs` is an (n, 2) integer array of axis indices.
+    """
+    if not len(pairs):
+        return axes
+    x = axes[pairs[:, 0]]
+    y = axes[pairs[:, 1]]
+    magnitude = np.hypot(x, y)
+    scaled = np.clip((magnitude - deadzone) / (1.0 - deadzone), 0.0, 1.0)
+    gain = np.divide(scaled, magnitude, out=np.zeros_like(magnitude), where=magnitude > 0)
+    axes[pairs[:, 0]] = x * gain
+    axes[pairs[:, 1]] = y * gain
+    return axes
+
+
+def axial_deadzone(values, deadzone):
+    """Rescale each value from [deadzone, 1] to [0, 1], keeping its sign."""
+    magnitude = np.clip((np.abs(values) - deadzone) / (1.0 - deadzone), 0.0, 1.0)
+    return np.copysign(magnitude, values)
+
+
+def expo(values, amount):
+    """
+    Exponential response curve: (1 - amount) * x + amount * x^3.
+    amount=0 is linear; larger values give finer control near the centre
+    while still reaching full speed at full deflection.
+    """
+    if amount == 0:
+        return values
+    return (1.0 - amount) * values + amount * values * values * values
+
+
+class OneEuroFilter:
+    """
+    Vectorized one-euro filter (Casiez et al.) over a fixed number of channels.
+
+    Slow movements get a low cutoff (min_cutoff, Hz) to remove jitter; the
+    cutoff rises with speed by `beta` to keep fast movements responsive.
+    All channels share parameters and are updated in one NumPy pass.
+    """
+
+    def __init__(self, channels, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.x = np.zeros(channels)
+        self.dx = np.zeros(channels)
+        self.initialized = False
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def reset(self):
+        self.x[:] = 0.0
+        self.dx[:] = 0.0
+        self.initialized = False
+
+    def __call__(self, values, dt):
+        """Filter one sample of all channels taken dt seconds after the previous."""
+        if not self.initialized or dt <= 0:
+            self.x[:] = values
+            self.dx[:] = 0.0
+            self.initialized = True
+            return self.x.copy()
+
+        dx = (values - self.x) / dt
+        self.dx += self._alpha(self.d_cutoff, dt) * (dx - self.dx)
+        cutoff = self.min_cutoff + self.beta * np.abs(self.dx)
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        alpha = 1.0 / (1.0 + tau / dt)
+        self.x += alpha * (values - self.x)
+        return self.x.copy()
+
+
+class AxisConditioner:
+    """
+    Turn one device's raw axis readings into normalized joint demands.
+
+    Stick pairs get a radial deadzone, any other mapped axis an axial one;
+    the expo curve is applied after the deadzone. The axis-to-joint mapping
+    is precomputed as index arrays so a tick is a handful of NumPy ops.
+    """
+
+    def __init__(self, input_map, joints=4):
+        self.joints = joints
+        self.deadzone = input_map.deadzone
+        self.expo = input_map.expo
+        self.pairs = np.asarray(input_map.stick_pairs, dtype=np.intp).reshape(-1, 2)
+        paired = set(self.pairs.ravel().tolist())
+        mapping = input_map.axis_map
+        self.joint_index = np.array([joint for joint, _, _ in mapping], dtype=np.intp)
+        self.axis_index = np.array([axis for _, axis, _ in mapping], dtype=np.intp)
+        self.signs = np.array([sign for _, _, sign in mapping], dtype=float)
+        self.unpaired = np.array([axis for axis in self.axis_index.tolist() if axis not in paired],
+                                 dtype=np.intp)
+        self.gripper_axes = input_map.gripper_axes
+        self.max_axis = max([axis for _, axis, _ in mapping] +
+                            list(self.gripper_axes or ()) +
+                            self.pairs.ravel().tolist() + [-1])
+
+    def __call__(self, axes):
+        """Map a raw axis array (-1..1) to a joint demand array (-1..1)."""
+        demands = np.zeros(self.joints)
+        if len(axes) <= self.max_axis:
+            # Device reports fewer axes than mapped, pad with centred values
+            axes = np.concatenate((axes, np.zeros(self.max_axis + 1 - len(axes))))
+        conditioned = radial_deadzone(axes.copy(), self.pairs, self.deadzone)
+        if len(self.unpaired):
+            conditioned[self.unpaired] = axial_deadzone(conditioned[self.unpaired], self.deadzone)
+        conditioned = expo(conditioned, self.expo)
+        np.add.at(demands, self.joint_index, self.signs * conditioned[self.axis_index])
+
+        # Gripper (L2/R2 triggers)
+        # L2 closes (-1 to 1), R2 opens (-1 to 1), mapped to the 0..1 range
+        if self.gripper_axes is not None:
+            close_axis, open_axis = self.gripper_axes
+            trigger = np.array([(axes[open_axis] - axes[close_axis]) / 2])
+            demands[3] += axial_deadzone(trigger, self.deadzone)[0]
+        return demands
+
+
+class RateIntegrator:
+    """
+    Convert filtered joint demands into per-tick angle changes.
+
+    A demand of 1.0 moves a joint at max_rate degrees per second. Changes
+    are demand * max_rate * dt with dt measured by the caller, so jog speed
+    is the same at any poll rate; dt is capped so a late tick cannot jump.
+    Filtered demands below `snap` are zeroed so the filter's decay tail does
+    not keep sending tiny moves after the stick is released.
+    """
+
+    def __init__(self, joints=4, min_cutoff=1.0, beta=0.0, d_cutoff=1.0, max_dt=0.2, snap=0.01):
+        self.filter = OneEuroFilter(joints, min_cutoff, beta, d_cutoff)
+        self.max_dt = max_dt
+        self.snap = snap
+
+    def reset(self):
+        self.filter.reset()
+
+    def __call__(self, demands, max_rate, dt):
+        dt = min(dt, self.max_dt)
+        filtered = np.clip(self.filter(np.clip(demands, -1.0, 1.0), dt), -1.0, 1.0)
+        filtered[np.abs(filtered) < self.snap] = 0.0
+        return filtered * (max_rate * dt)
+
+
+def benchmark_conditioning(iterations=20000):
+    """Time one conditioning + filter + integration tick. Returns microseconds."""
+    from config import SERVO_NAMES, AxisMapping, InputMap
+
+    input_map = InputMap('', {
+        'base': AxisMapping(0, invert=True),
+        'shoulder': AxisMapping(3),
+        'elbow': AxisMapping(1),
+    }, 4, 5, 0.1, expo=0.3, stick_pairs=((0, 1), (2, 3)))
+    conditioner = AxisConditioner(input_map, len(SERVO_NAMES))
+    integrator = RateIntegrator(len(SERVO_NAMES), min_cutoff=1.5, beta=0.5)
+
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(-1.0, 1.0, size=(256, 6))
+    start = time.perf_counter()
+    for i in range(iterations):
+        integrator(conditioner(samples[i & 255]), 100.0, 0.02)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+if __name__ == "__main__":
+    # Same as `python -m robot_arm_control bench conditioning`
+    from robot_arm_control import main
+    raise SystemExit(main(['bench', 'conditioning']))
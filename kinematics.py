@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class ArmGeometry:
+    """
+    Approximate EEZYbotARM MK2 geometry, lengths in millimetres.
+
+    The shoulder servo sets the main arm's elevation from horizontal as
+    180 - angle (90 = vertical, larger angles lean forward). Through the parallel linkage the elbow servo sets the
+    forearm's elevation directly, independent of the main arm (90 =
+    horizontal, larger angles point it down). The gripper stays level.
+    The base servo yaws the arm around the vertical axis (90 = straight ahead).
+    """
+
+    def __init__(self, shoulder_height=105.0, upper_arm=135.0, forearm=147.0,
+                 gripper=60.0, link_radius=15.0):
+        self.shoulder_height = shoulder_height
+        self.upper_arm = upper_arm
+        self.forearm = forearm
+        self.gripper = gripper
+        self.link_radius = link_radius
+
+    def key(self):
+        return (self.shoulder_height, self.upper_arm, self.forearm, self.gripper, self.link_radius)
+
+
+def joint_frames(q, geometry):
+    """
+    Joint positions for servo angles q, shape (..., 4) in degrees.
+
+    Returns (shoulder, elbow, wrist, tip) arrays of shape (..., 3) plus the
+    unit yaw direction (..., 3); z is up, x straight ahead at base=90.
+    """
+    q = np.asarray(q, dtype=float)
+    yaw = np.radians(q[..., 0] - 90.0)
+    upper_elevation = np.radians(180.0 - q[..., 1])
+    forearm_elevation = np.radians(90.0 - q[..., 2])
+
+    direction = np.stack((np.cos(yaw), np.sin(yaw), np.zeros_like(yaw)), axis=-1)
+    up = np.array([0.0, 0.0, 1.0])
+
+    shoulder = np.broadcast_to(up * geometry.shoulder_height, direction.shape)
+    elbow = shoulder + geometry.upper_arm * (
+        direction * np.cos(upper_elevation)[..., None] + up * np.sin(upper_elevation)[..., None])
+    wrist = elbow + geometry.forearm * (
+        direction * np.cos(forearm_elevation)[..., None] + up * np.sin(forearm_elevation)[..., None])
+    tip = wrist + geometry.gripper * direction
+    return shoulder, elbow, wrist, tip, direction
+
+
+def link_points(q, geometry, samples=4, skip_upper=0.4):
+    """
+    Sample points along the links for collision checks, shape (..., P, 3).
+
+    The first `skip_upper` fraction of the main arm sits inside the base
+    and is left out, so the base model does not collide with itself.
+    """
+    shoulder, elbow, wrist, tip, _ = joint_frames(q, geometry)
+    upper_t = np.linspace(skip_upper, 1.0, samples)
+    link_t = np.linspace(0.0, 1.0, samples)[1:]
+
+    def along(a, b, t):
+        return a[..., None, :] + (b - a)[..., None, :] * t[:, None]
+
+    return np.concatenate((along(shoulder, elbow, upper_t),
+                           along(elbow, wrist, link_t),
+                           along(wrist, tip, link_t)), axis=-2)
+
+
+def tip_position(q, geometry):
+    """Gripper tip position for servo angles q, shape (..., 3)."""
+    return joint_frames(q, geometry)[3]
@@ -0,0 +1,170 @@
+import logging
+import logging.handlers
+import queue
+import struct
+import threading
+import time
+
+LOG_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+# Set by setup_logging() when a binary event log is configured
+binary_log = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token-bucket limit for chatty DEBUG call sites.
+
+    Each (logger, message template) pair may emit `rate` records per second
+    with bursts up to `burst`; the rest are dropped and counted. Records
+    above `max_level` always pass. Keys use the unformatted template, so
+    dropping a record never costs a string format.
+    """
+
+    def __init__(self, rate=20.0, burst=20, max_level=logging.DEBUG):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_level = max_level
+        self.buckets = {}
+        self.suppressed = 0
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        key = (record.name, record.msg)
+        now = record.created
+        tokens, last = self.buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens < 1:
+            self.buckets[key] = (tokens, now)
+            self.suppressed += 1
+            return False
+        self.buckets[key] = (tokens - 1, now)
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats every record before queueing it. Here the
+    record is queued as is, so callers must not mutate objects they pass
+    as log arguments afterwards.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class BinaryEventLog:
+    """
+    Compact binary log for high-frequency numeric events.
+
+    Each record is a little-endian (float64 monotonic time, uint16 event id,
+    four float32 values) tuple, 26 bytes. log() only puts a tuple on a queue;
+    packing and file writes happen on a background thread in batches.
+    """
+    RECORD = struct.Struct('<dH4f')
+
+    def __init__(self, path, flush_interval=0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.event_names = {}
+        self._queue = queue.SimpleQueue()
+        self._stop_event = threading.Event()
+        self._file = open(path, 'wb')
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def event_id(self, name):
+        """Return a stable numeric id for an event name."""
+        event_id = self.event_names.get(name)
+        if event_id is None:
+            event_id = self.event_names[name] = len(self.event_names)
+        return event_id
+
+    def log(self, event_id, a=0.0, b=0.0, c=0.0, d=0.0):
+        self._queue.put((time.monotonic(), event_id, a, b, c, d))
+
+    def _drain(self):
+        pack = self.RECORD.pack
+        chunk = bytearray()
+        while True:
+            try:
+                chunk += pack(*self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if chunk:
+            self._file.write(chunk)
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self._drain()
+        self._drain()
+
+    def close(self):
+        """Write remaining records and close the file, with an event-name index next to it."""
+        self._stop_event.set()
+        self._thread.join()
+        self._file.close()
+        with open(self.path + '.names', 'w', encoding='utf-8') as f:
+            for name, event_id in sorted(self.event_names.items(), key=lambda item: item[1]):
+                f.write(f"{event_id} {name}\n")
+
+
+def read_binary_log(path):
+    """Read a binary event log back as a list of (time, event_id, values) tuples."""
+    record = BinaryEventLog.RECORD
+    with open(path, 'rb') as f:
+        data = f.read()
+    return [(t, event_id, values) for t, event_id, *values in record.iter_unpack(
+        data[:len(data) - len(data) % record.size])]
+
+
+_listener = None
+
+
+def setup_logging(level='INFO', modules=None, debug_rate_limit=20.0, binary_log_path=None):
+    """
+    Route all logging through a queue to a background writer thread.
+
+    Callers only pay for creating a LogRecord and a queue put; formatting
+    and the stdout write happen on the listener thread. `modules` maps
+    logger names to their own levels. DEBUG records are rate limited per
+    call site when debug_rate_limit is set.
+    """
+    global _listener, binary_log
+    shutdown_logging()
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    if debug_rate_limit:
+        queue_handler.addFilter(RateLimitFilter(debug_rate_limit, burst=max(1, int(debug_rate_limit))))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    for name, module_level in (modules or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+    if binary_log_path:
+        binary_log = BinaryEventLog(binary_log_path)
+
+
+def shutdown_logging():
+    """Flush and stop the background writers."""
+    global _listener, binary_log
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if binary_log is not None:
+        binary_log.close()
+        binary_log = None
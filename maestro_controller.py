@@ -1,11 +1,33 @@
+import logging
 import serial
+import threading
 import time
 
+import log_setup
+
+logger = logging.getLogger(__name__)
+
 class MaestroController:
-    def __init__(self, port='/dev/ttyACM0', device_number=0x0C):
+    def __init__(self, port='/dev/ttyACM0', device_number=0x0C, profile=None,
+                 read_timeout=0.02, write_timeout=0.05):
+        if profile is not None:
+            port = profile.port
+            device_number = profile.device_number
         self.port = port
         self.device_number = device_number
         self.serial = None
+        # Short timeouts so a silent or stuck device cannot hold a lock for long
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        # Serial writes are shared with the watchdog thread. The write lock is
+        # only held for a single write; a query also holds _query_lock until
+        # its answer is read, so the fail-safe never waits on a pending read.
+        self.lock = threading.RLock()
+        self._query_lock = threading.Lock()
+        # Set by hold()/go_limp(); motion commands are ignored until release()
+        self.locked = False
+        # Set by go_limp(): no channel is driven, so the servos carry no load
+        self.limp = False
         self.connect()
         
         # Define servo channels
@@ -17,6 +39,9 @@ class MaestroController:
         # Define servo limits (in microseconds)
         self.SERVO_MIN = 2000  # Typically ~4000 for 0 degrees
         self.SERVO_MAX = 10000  # Typically ~8000 for 180 degrees
+        self._update_mapping()
+        if profile is not None:
+            self.apply_profile(profile)
         
         # Current angles
         self.current_angles = {
@@ -26,12 +51,31 @@ class MaestroController:
             'gripper': 90
         }
 
+    def _update_mapping(self):
+        """Precompute the name-to-channel map and angle scale used by set_angle."""
+        self.channel_map = {
+            'base': self.BASE_CHANNEL,
+            'shoulder': self.SHOULDER_CHANNEL,
+            'elbow': self.ELBOW_CHANNEL,
+            'gripper': self.GRIPPER_CHANNEL
+        }
+        self.target_scale = (self.SERVO_MAX - self.SERVO_MIN) / 180.0
+
+    def apply_profile(self, profile):
+        """Apply channels and pulse limits from a CompiledProfile."""
+        (self.BASE_CHANNEL, self.SHOULDER_CHANNEL,
+         self.ELBOW_CHANNEL, self.GRIPPER_CHANNEL) = profile.channels
+        self.SERVO_MIN = profile.servo_min
+        self.SERVO_MAX = profile.servo_max
+        self._update_mapping()
+
     def connect(self):
         """Connect to the Maestro controller."""
         try:
-            self.serial = serial.Serial(self.port, timeout=1)
+            self.serial = serial.Serial(self.port, timeout=self.read_timeout,
+                                        write_timeout=self.write_timeout)
         except serial.SerialException as e:
-            print(f"Error connecting to Maestro: {e}")
+            logger.error("Error connecting to Maestro: %s", e)
             raise
 
     def close(self):
@@ -39,21 +83,92 @@ class MaestroController:
         if self.serial:
             self.serial.close()
 
-    def _send_command(self, command, channel, value=None):
-        """Send a command to the Maestro controller."""
-        if value is not None:
-            cmd = chr(command) + chr(channel) + chr(value & 0x7F) + chr((value >> 7) & 0x7F)
-        else:
-            cmd = chr(command) + chr(channel)
-        self.serial.write(cmd.encode('latin-1'))
+    def _send_motion(self, cmd):
+        """
+        Write a motion command unless hold()/go_limp() locked the arm. The
+        check is made under the write lock, so nothing sent after a fail-safe
+        can re-energise the servos. Returns True if the command was sent.
+        """
+        with self.lock:
+            if self.locked:
+                return False
+            return self._write(cmd)
+
+    def _write(self, cmd):
+        """Write under the held lock; log and return False if the link failed."""
+        try:
+            self.serial.write(cmd)
+        except serial.SerialTimeoutException:
+            logger.error("Maestro did not accept a command within %.0f ms",
+                         self.write_timeout * 1000)
+            return False
+        except serial.SerialException as e:
+            logger.error("Error writing to Maestro: %s", e)
+            return False
+        return True
+
+    def _send_failsafe(self, cmd):
+        """
+        Lock out motion and write a fail-safe command from any thread.
+        Waits at most one write timeout for a write in progress, then writes
+        anyway, so the reaction time stays bounded.
+        """
+        acquired = self.lock.acquire(timeout=self.write_timeout)
+        try:
+            self.locked = True
+            if not acquired:
+                logger.warning("Serial write lock busy, sending fail-safe command anyway")
+            self.serial.write(cmd)
+            self.serial.flush()
+        finally:
+            if acquired:
+                self.lock.release()
+
+    def _query(self, cmd, size):
+        """Send a command that answers with `size` bytes; None if it did not answer."""
+        with self._query_lock:
+            # Drop a late answer to an earlier, timed-out query
+            self.serial.reset_input_buffer()
+            try:
+                with self.lock:
+                    self.serial.write(cmd)
+            except serial.SerialTimeoutException:
+                return None
+            data = self.serial.read(size)
+        return data if len(data) == size else None
 
     def set_target(self, channel, target):
         """
         Set channel to a specified target.
         Target is in units of quarter microseconds, so 6000 = 1500 microseconds
+        Returns False if the command was not sent.
         """
         target = max(self.SERVO_MIN, min(self.SERVO_MAX, target))
-        self._send_command(0x84, channel, target)
+        if not self._send_motion(bytes((0x84, channel, target & 0x7F, (target >> 7) & 0x7F))):
+            return False
+        binary_log = log_setup.binary_log
+        if binary_log is not None:
+            binary_log.log(binary_log.event_id('maestro.target'), channel, target)
+        return True
+
+    def set_targets(self, channels, targets):
+        """
+        Set several channels with a single serial write.
+        Targets are in quarter microseconds, one per channel.
+        Returns False if the command was not sent.
+        """
+        cmd = bytearray()
+        for channel, target in zip(channels, targets):
+            target = max(self.SERVO_MIN, min(self.SERVO_MAX, int(target)))
+            cmd += bytes((0x84, channel, target & 0x7F, (target >> 7) & 0x7F))
+        if not self._send_motion(cmd):
+            return False
+        binary_log = log_setup.binary_log
+        if binary_log is not None:
+            event_id = binary_log.event_id('maestro.target')
+            for channel, target in zip(channels, targets):
+                binary_log.log(event_id, channel, target)
+        return True
 
     def set_angle(self, servo_name, angle):
         """Set servo angle (0-180 degrees)."""
@@ -61,27 +176,113 @@ class MaestroController:
         angle = max(0, min(360, angle))
         
         # Map angle to servo range
-        target = int(self.SERVO_MIN + (angle / 180.0) * (self.SERVO_MAX - self.SERVO_MIN))
-        print("Target: ", target)
-        # Determine channel based on servo name
-        channel_map = {
-            'base': self.BASE_CHANNEL,
-            'shoulder': self.SHOULDER_CHANNEL,
-            'elbow': self.ELBOW_CHANNEL,
-            'gripper': self.GRIPPER_CHANNEL
-        }
-        
-        if servo_name in channel_map:
-            self.set_target(channel_map[servo_name], target)
-            self.current_angles[servo_name] = angle
+        target = int(self.SERVO_MIN + angle * self.target_scale)
+        logger.debug("Target: %d", target)
+        channel = self.channel_map.get(servo_name)
+        if channel is not None:
+            if self.set_target(channel, target):
+                self.current_angles[servo_name] = angle
         else:
             raise ValueError(f"Invalid servo name: {servo_name}")
 
+    def get_position(self, channel):
+        """
+        Read the position the Maestro is currently driving a channel to.
+        Returned in quarter microseconds, or None if the device did not answer.
+        """
+        data = self._query(bytes((0x90, channel)), 2)
+        if data is None:
+            return None
+        return data[0] | (data[1] << 8)
+
+    def get_errors(self):
+        """
+        Read and clear the Maestro error register, or None if it did not answer.
+        Also serves as a keep-alive when the serial timeout is enabled.
+        """
+        data = self._query(bytes((0xA1,)), 2)
+        if data is None:
+            return None
+        return data[0] | (data[1] << 8)
+
+    def restart_script(self, subroutine, parameter=None):
+        """
+        Start the on-board script at a subroutine (0xA7), optionally with a
+        parameter pushed on its stack (0xA8), such as a repeat count of
+        1..16383. Ignored while locked.
+        """
+        if parameter is None:
+            cmd = bytes((0xA7, subroutine))
+        else:
+            if not 1 <= parameter <= 0x3FFF:
+                raise ValueError(f"Script parameter must be between 1 and 16383, got {parameter}")
+            cmd = bytes((0xA8, subroutine, parameter & 0x7F, (parameter >> 7) & 0x7F))
+        self._send_motion(cmd)
+
+    def _clear_speeds(self):
+        """Commands (0x87) that remove the speed limit on every channel."""
+        cmd = bytearray()
+        for channel in self.channel_map.values():
+            cmd += bytes((0x87, channel, 0, 0))
+        return cmd
+
+    def stop_script(self):
+        """
+        Stop the on-board script; servos keep their current targets. The
+        speed limits a script sets stay in the Maestro, so they are cleared
+        too, or later moves would run at the last script piece's speed.
+        Returns False if the command was not sent.
+        """
+        with self.lock:
+            return self._write(bytes((0xA4,)) + self._clear_speeds())
+
+    def script_running(self):
+        """Return whether the on-board script is running, or None if the device did not answer."""
+        data = self._query(bytes((0xAE,)), 1)
+        if data is None:
+            return None
+        return data[0] == 0
+
+    def get_measured_angle(self, servo_name):
+        """Read a servo's current position from the Maestro as an angle."""
+        position = self.get_position(self.channel_map[servo_name])
+        if not position:
+            # No answer, or the channel is off (target 0)
+            return None
+        return (position - self.SERVO_MIN) / self.target_scale
+
     def get_angle(self, servo_name):
         """Get the current angle of a servo."""
         return self.current_angles.get(servo_name, 0)
 
+    def hold(self):
+        """
+        Freeze the arm where it is and ignore further motion commands.
+        The Maestro keeps driving the last targets; call release() to resume.
+        """
+        self._send_failsafe(bytes((0xA4,)))
+
+    def go_limp(self):
+        """
+        Stop sending pulses on all channels (target 0) and lock out motion.
+        Unpowered hobby servos stop holding torque, so the arm may sag.
+        """
+        # Stop any on-board script first so it cannot drive the servos again
+        cmd = bytearray((0xA4,))
+        for channel in self.channel_map.values():
+            cmd += bytes((0x84, channel, 0, 0))
+        self.limp = True
+        self._send_failsafe(cmd)
+
+    def release(self):
+        """Accept motion commands again after hold() or go_limp()."""
+        self.locked = False
+        self.limp = False
+        # hold() and go_limp() stop a running script but leave its speed limits set
+        self._send_motion(self._clear_speeds())
+
     def emergency_stop(self):
         """Stop all servos immediately."""
-        for channel in range(4):
+        self.stop_script()
+        for channel in self.channel_map.values():
             self.set_target(channel, 6000)  # Move to neutral position 
\ No newline at end of file
@@ -0,0 +1,173 @@
+import logging
+import math
+import re
+import shutil
+import subprocess
+
+import numpy as np
+
+from program import angles_to_targets, min_jerk
+
+logger = logging.getLogger(__name__)
+
+# Subroutines are numbered in the order they are defined in the script
+SUB_CYCLE = 0  # one pass through the waypoints, called by the entry points
+SUB_ONCE = 1  # approach the start pose, play once and stop
+SUB_LOOP = 2  # approach, then repeat until stopped
+SUB_COUNT = 3  # approach, then repeat N times (N passed with 0xA8)
+
+# Bytes of script memory on the Micro Maestro (6 channels) and the Mini Maestros
+SCRIPT_CAPACITY = {6: 1024, 12: 8192, 18: 8192, 24: 8192}
+
+# Maestro speed limits are in 0.25 us per 10 ms
+_SPEED_PERIOD_MS = 10
+
+# Largest value a script literal can hold
+_MAX_LITERAL = 32767
+
+# Script commands the compiler emits, one bytecode byte each
+_COMMANDS = {'servo', 'speed', 'acceleration', 'delay', 'quit', 'return', 'dup', 'drop',
+             'minus', 'get_moving_state'}
+
+
+class ScriptError(ValueError):
+    """Raised when a program cannot be turned into a script that fits the device."""
+
+
+def estimate_size(source):
+    """
+    Upper bound on the compiled size of a script in bytes.
+
+    Every literal is counted as a 16-bit push (3 bytes), every command as
+    one byte, and subroutine calls and loop jumps as 3 bytes, so the
+    compiler's real output is never larger.
+    """
+    size = 0
+    for line in source.splitlines():
+        for token in line.split('#', 1)[0].split():
+            lowered = token.lower()
+            if re.fullmatch(r'-?\d+', token):
+                size += 3
+            elif lowered in ('sub', 'begin'):
+                continue
+            elif lowered in ('repeat', 'while', 'if', 'else', 'endif'):
+                size += 3
+            elif lowered in _COMMANDS:
+                size += 1
+            else:
+                # Call of a subroutine or subroutine name after 'sub'
+                size += 3
+    return size
+
+
+
+class ScriptCompiler:
+    """
+    Compile a MotionProgram into Maestro script source.
+
+    Each waypoint segment is split into `substeps` pieces that follow the
+    same minimum-jerk profile as compile_program(). For each piece the
+    Maestro's own speed limit is set per channel so that all joints arrive
+    together, then the script waits for the piece's duration. The servo
+    pulses are timed by the Maestro, so playback has no host round-trips.
+    """
+
+    def __init__(self, profile, substeps=4, approach_speed=20):
+        self.profile = profile
+        self.substeps = substeps
+        # Speed limit for the move to the start pose, in 0.25 us per 10 ms
+        self.approach_speed = approach_speed
+
+    def compile(self, program, substeps=None):
+        """Return the script source for `program`."""
+        if not len(program):
+            raise ScriptError("Cannot compile an empty program")
+        substeps = self.substeps if substeps is None else substeps
+        profile = self.profile
+        channels = profile.channels
+        waypoints = np.clip(np.asarray(program.waypoints, dtype=float), profile.lower, profile.upper)
+        start = waypoints[-1] if program.loop else waypoints[0]
+
+        lines = [f"# Generated from motion program '{program.name}'",
+                 f"# Entry subroutines: {SUB_ONCE} once, {SUB_LOOP} loop, {SUB_COUNT} count (0xA8)",
+                 "quit", "", "sub cycle"]
+        previous = angles_to_targets(start, profile).astype(int)
+        s = min_jerk(np.arange(1, substeps + 1) / substeps)
+        pending_delay = 0
+        for waypoint, duration in zip(waypoints, program.durations):
+            goal = angles_to_targets(waypoint, profile).astype(int)
+            piece_ms = min(_MAX_LITERAL, max(1, int(round(duration * 1000 / substeps))))
+            segment_start = previous
+            for fraction in s:
+                target = np.rint(segment_start + (goal - segment_start) * fraction).astype(int)
+                commands = []
+                for channel, old, new in zip(channels, previous, target):
+                    if new == old:
+                        continue
+                    speed = max(1, math.ceil(abs(new - old) * _SPEED_PERIOD_MS / piece_ms))
+                    commands.append(f"{speed} {channel} speed {new} {channel} servo")
+                if not commands and pending_delay and pending_delay + piece_ms <= _MAX_LITERAL:
+                    # Nothing moves, extend the previous wait instead
+                    pending_delay += piece_ms
+                else:
+                    if pending_delay:
+                        lines.append(f"  {pending_delay} delay")
+                    if commands:
+                        lines.append("  " + " ".join(commands))
+                    pending_delay = piece_ms
+                previous = target
+        if pending_delay:
+            lines.append(f"  {pending_delay} delay")
+        lines.append("  return")
+
+        start_targets = angles_to_targets(start, profile).astype(int)
+        approach = " ".join(f"{self.approach_speed} {channel} speed {target} {channel} servo"
+                            for channel, target in zip(channels, start_targets))
+        wait = "begin get_moving_state while repeat"
+        accelerations = " ".join(f"0 {channel} acceleration" for channel in channels)
+        # Speed limits outlive the script, so clear them before handing back to the host
+        speeds = " ".join(f"0 {channel} speed" for channel in channels)
+        lines += ["", "sub play_once", f"  {accelerations}", f"  {approach}", f"  {wait}",
+                  "  cycle", f"  {speeds}", "  quit",
+                  "", "sub play_loop", f"  {accelerations}", f"  {approach}", f"  {wait}",
+                  "  begin cycle repeat",
+                  "", "sub play_count", f"  {accelerations}", f"  {approach}", f"  {wait}",
+                  "  begin dup while cycle 1 minus repeat",
+                  f"  {speeds}", "  quit", ""]
+        return "\n".join(lines)
+
+    def compile_to_fit(self, program, capacity=SCRIPT_CAPACITY[6]):
+        """
+        Compile with as many substeps as fit in `capacity` bytes of script
+        memory, down to plain linear segments. Raises ScriptError if even
+        those do not fit.
+        """
+        for substeps in range(self.substeps, 0, -1):
+            source = self.compile(program, substeps)
+            size = estimate_size(source)
+            if size <= capacity:
+                if substeps < self.substeps:
+                    logger.warning("Reduced to %d substeps per segment to fit %d bytes",
+                                   substeps, capacity)
+                return source
+        raise ScriptError(f"Program needs about {size} bytes of script memory, "
+                          f"the device has {capacity}")
+
+
+def upload_script(path, device=None, usccmd=None):
+    """
+    Compile and load a script into the Maestro's flash with Pololu's UscCmd
+    utility (part of the Maestro Servo Controller software), which then
+    restarts the device. The Maestro Control Center's Script tab does the same.
+    """
+    usccmd = usccmd or shutil.which('UscCmd') or shutil.which('UscCmd.exe')
+    if usccmd is None:
+        raise ScriptError("UscCmd not found; install the Pololu Maestro software or "
+                          "load the script from the Maestro Control Center")
+    command = [usccmd, '--program', path]
+    if device:
+        command += ['--device', device]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ScriptError(f"UscCmd failed: {(result.stderr or result.stdout).strip()}")
+    logger.info("Uploaded script %s", path)
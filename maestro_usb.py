@@ -0,0 +1,61 @@
+# Native USB access to Pololu Maestro device settings.
+# The serial protocol can only move servos; persistent settings such as the
+# serial timeout are written with vendor control transfers over USB. This
+# needs the optional pyusb package (pip install pyusb) and a libusb backend.
+try:
+    import usb.core
+except ImportError:
+    usb = None
+
+POLOLU_VENDOR_ID = 0x1FFB
+# Micro Maestro 6, Mini Maestro 12, 18 and 24
+MAESTRO_PRODUCT_IDS = (0x0089, 0x008A, 0x008B, 0x008C)
+
+REQUEST_SET_PARAMETER = 0x82
+REQUEST_REINITIALIZE = 0x90
+
+PARAMETER_SERIAL_TIMEOUT = 6  # 2 bytes, units of 10 ms, 0 disables
+
+
+class MaestroUsbError(RuntimeError):
+    """Raised when the Maestro cannot be reached over native USB."""
+
+
+def find_device(serial_number=None):
+    """Return the first attached Maestro, optionally matching a serial number."""
+    if usb is None:
+        raise MaestroUsbError("Maestro USB access requires pyusb (pip install pyusb)")
+    for product_id in MAESTRO_PRODUCT_IDS:
+        for device in usb.core.find(find_all=True, idVendor=POLOLU_VENDOR_ID,
+                                    idProduct=product_id):
+            if serial_number is None or device.serial_number == serial_number:
+                return device
+    raise MaestroUsbError("No Maestro found on USB")
+
+
+def set_parameter(device, parameter, value, size):
+    """Write a raw settings parameter of `size` bytes."""
+    device.ctrl_transfer(0x40, REQUEST_SET_PARAMETER, value, (size << 8) | parameter)
+
+
+def reinitialize(device):
+    """Make the Maestro apply newly written settings."""
+    device.ctrl_transfer(0x40, REQUEST_REINITIALIZE, 0, 0)
+
+
+def set_serial_timeout(timeout_ms, serial_number=None):
+    """
+    Program the Maestro's serial timeout.
+
+    If no serial command arrives for timeout_ms, the Maestro raises a
+    serial timeout error and drives every channel to its configured
+    error/home behaviour by itself, independent of the PC. 0 disables it.
+    """
+    if not 0 <= timeout_ms <= 655350:
+        raise ValueError("Serial timeout must be between 0 and 655350 ms")
+    device = find_device(serial_number)
+    try:
+        set_parameter(device, PARAMETER_SERIAL_TIMEOUT, (timeout_ms + 9) // 10, 2)
+        reinitialize(device)
+    except usb.core.USBError as e:
+        raise MaestroUsbError(f"Error writing Maestro settings: {e}")
@@ -1,4 +1,5 @@
 import sys
+import logging
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                            QHBoxLayout, QPushButton, QComboBox, QLabel)
 from PyQt6.QtCore import QTimer, Qt
@@ -6,8 +7,13 @@ from PyQt6.QtGui import QPixmap
 import pyqtgraph as pg
 import numpy as np
 from camera_manager import CameraManager
+from config import ConfigStore
 from controller import PS4Controller
 from maestro_controller import MaestroController
+from config import load_logging_config
+from log_setup import setup_logging, shutdown_logging
+
+logger = logging.getLogger(__name__)
 
 class RobotArmControlUI(QMainWindow):
     def __init__(self):
@@ -15,9 +21,14 @@ class RobotArmControlUI(QMainWindow):
         self.setWindowTitle("EEZYbotARM MK2 Controller")
         self.setGeometry(100, 100, 1200, 800)
 
+        # Servo limits, port and input mapping live in config.json
+        self.config = ConfigStore(profile='macos')
+        self.profile = self.config.compiled
+        self.config.add_listener(self.apply_profile)
+
         # Initialize components
         self.camera_manager = CameraManager()
-        self.controller = PS4Controller()
+        self.controller = PS4Controller(self.profile)
         self.controller.control_updated.connect(self.update_robot)
         
         # Track desired angles separately from servo controller
@@ -29,14 +40,27 @@ class RobotArmControlUI(QMainWindow):
         }
         
         try:
-            self.servo_controller = MaestroController(port='/dev/cu.usbmodem00000000001A1')  # Updated port for macOS
+            self.servo_controller = MaestroController(profile=self.profile)
         except Exception as e:
-            print(f"Error initializing Maestro controller: {e}")
+            logger.error("Error initializing Maestro controller: %s", e)
             self.servo_controller = None
 
         # Setup UI
         self.setup_ui()
 
+        # Pick up configuration edits without restarting the control loop
+        self.config_timer = QTimer()
+        self.config_timer.timeout.connect(self.config.check_for_changes)
+        self.config_timer.start(1000)
+
+    def apply_profile(self, profile):
+        """Apply a reloaded configuration profile."""
+        logger.info("Configuration reloaded: %s", profile.name)
+        self.profile = profile
+        self.controller.apply_profile(profile)
+        if self.servo_controller:
+            self.servo_controller.apply_profile(profile)
+
     def setup_ui(self):
         # Create central widget and main layout
         central_widget = QWidget()
@@ -193,7 +217,7 @@ class RobotArmControlUI(QMainWindow):
 
     def handle_camera_error(self, side, error_msg):
         """Handle camera errors by showing message and resetting state."""
-        print(f"Camera error ({side}): {error_msg}")
+        logger.error("Camera error (%s): %s", side, error_msg)
         button = self.left_camera_button if side == "left" else self.right_camera_button
         label = self.left_camera_label if side == "left" else self.right_camera_label
         
@@ -208,25 +232,27 @@ class RobotArmControlUI(QMainWindow):
 
     def toggle_controller(self):
         if not self.controller.running:
-            if self.controller.connect():
-                print("Starting controller")
-                self.controller.start()
-                self.controller_button.setText("Stop Controller")
+            # Devices are picked up as they connect, polling can start right away
+            logger.info("Starting controller")
+            self.controller.start()
+            self.controller_button.setText("Stop Controller")
         else:
-            print("Stopping controller")
+            logger.info("Stopping controller")
             self.controller.stop()
             self.controller_button.setText("Start Controller")
 
     def update_robot(self, changes):
         """Handle controller updates."""
-        print(f"Updating robot with changes: {changes}")
+        logger.debug("Updating robot with changes: %s", changes)
         
         # Update desired angles based on controller input
-        for servo_name, change in changes.items():
+        profile = self.profile
+        for index, servo_name in enumerate(profile.names):
+            change = changes.get(servo_name, 0)
             if change != 0:
                 current = self.desired_angles[servo_name]
-                new_angle = max(0, min(180, current + change))
-                print(f"Setting {servo_name} from {current} to {new_angle}")
+                new_angle = max(profile.lower[index], min(profile.upper[index], current + change))
+                logger.debug("Setting %s from %.1f to %.1f", servo_name, current, new_angle)
                 self.desired_angles[servo_name] = new_angle
                 
                 # Update actual servo if connected
@@ -247,7 +273,7 @@ class RobotArmControlUI(QMainWindow):
             end_x = np.cos(rad_angle)
             end_y = np.sin(rad_angle)
             
-            print(f"Updating gauge for {servo_name}: {angle}° ({end_x:.2f}, {end_y:.2f})")
+            logger.debug("Updating gauge for %s: %s° (%.2f, %.2f)", servo_name, angle, end_x, end_y)
             
             # Update pointer line (from center to edge)
             gauge['pointer'].setData(
@@ -281,6 +307,7 @@ class RobotArmControlUI(QMainWindow):
 
     def closeEvent(self, event):
         # Cleanup when closing the application
+        self.config_timer.stop()
         self.camera_manager.stop_all_cameras()
         if self.controller.running:
             self.controller.stop()
@@ -289,7 +316,12 @@ class RobotArmControlUI(QMainWindow):
         event.accept()
 
 if __name__ == '__main__':
+    log_config = load_logging_config()
+    setup_logging(log_config.level, log_config.modules,
+                  log_config.debug_rate_limit, log_config.binary_log)
     app = QApplication(sys.argv)
     window = RobotArmControlUI()
     window.show()
-    sys.exit(app.exec()) 
\ No newline at end of file
+    exit_code = app.exec()
+    shutdown_logging()
+    sys.exit(exit_code) 
\ No newline at end of file
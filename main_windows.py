@@ -1,4 +1,6 @@
 import sys
+import time
+import logging
 import platform
 import cv2
 import numpy as np
@@ -7,19 +9,34 @@ import pyqtgraph as pg
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout,
     QHBoxLayout, QPushButton, QComboBox, QLabel,
-    QSlider
+    QSlider, QCheckBox, QFileDialog
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QPixmap, QImage
 
 from camera_manager import CameraManager
+from config import ConfigStore
 from controller import PS4Controller
 from maestro_controller import MaestroController
+from maestro_usb import MaestroUsbError, set_serial_timeout
+from program import MotionProgram, ProgramPlayer, compile_program
+from telemetry import TelemetryRecorder
+from telemetry_panel import TelemetryPanel
+from thermal import ThermalModel
+from view_manager import ViewManager
+from watchdog import Supervisor
+from config import load_logging_config
+from log_setup import setup_logging, shutdown_logging
+
+logger = logging.getLogger(__name__)
 
 class RobotArmControlUI(QMainWindow):
+    # Emitted from the watchdog thread, delivered on the GUI thread
+    watchdog_tripped = pyqtSignal(str, float)
+
     def handle_camera_error(self, side, error_msg):
         """Handle camera errors by displaying a message and resetting the state."""
-        print(f"Camera error ({side}): {error_msg}")
+        logger.error("Camera error (%s): %s", side, error_msg)
 
         button = self.left_camera_button if side == "left" else self.right_camera_button
         label = self.left_camera_label if side == "left" else self.right_camera_label
@@ -36,48 +53,174 @@ class RobotArmControlUI(QMainWindow):
         self.setWindowTitle("EEZYbotARM MK2 Controller")
         self.setGeometry(100, 100, 1200, 800)
 
+        # Servo limits, port and input mapping live in config.json
+        self.config = ConfigStore(profile='windows')
+        self.profile = self.config.compiled
+        self.config.add_listener(self.apply_profile)
+
         self.camera_manager = CameraManager()
-        self.controller = PS4Controller()
+        # Skips redraws of hidden views and throttles unfocused ones
+        self.views = ViewManager(self)
+        self.controller = PS4Controller(self.profile)
         self.controller.control_updated.connect(self.update_robot)
+        self.controller.button_pressed.connect(self.handle_controller_button)
+        self.controller.devices_changed.connect(lambda names: self.update_controller_status())
+        self.controller.input_stale.connect(lambda stale: self.update_controller_status())
+
+        # Teach-and-playback state
+        self.program = MotionProgram()
+        self.teach_mode = False
+        self.player = None
+        self.playback_timer = QTimer()
+        self.playback_timer.timeout.connect(self.step_playback)
+
+        # Commanded/measured angles and loop timing history
+        self.telemetry = TelemetryRecorder(flush_dir='telemetry')
+        self.telemetry_panel = None
+        self.last_update_time = None
 
         self.active_cameras = {"left": None, "right": None}
-        self.desired_angles = {'base': 90, 'shoulder': 90, 'elbow': 90, 'gripper': 90}
-        self.servo_limits = {
-            'base': {'min': -40, 'max': 180},
-            'shoulder': {'min': 90, 'max': 160},
-            'elbow': {'min': 90, 'max': 120},
-            'gripper': {'min': 95, 'max': 180}
-        }
+        self.desired_angles = dict(zip(self.profile.names, self.profile.home))
         self.gauges = {}
 
         try:
-            self.servo_controller = MaestroController(port='COM12')  # Change COM port if needed
+            self.servo_controller = MaestroController(profile=self.profile)
         except Exception as e:
-            print(f"Error initializing Maestro controller: {e}")
+            logger.error("Error initializing Maestro controller: %s", e)
             self.servo_controller = None
 
+        # Servo load and thermal budget, relaxes the gripper or parks the arm on overrun
+        self.thermal = ThermalModel.from_config(self.profile.thermal)
+        self.thermal_action = None
+        self.thermal_timer = QTimer()
+        self.thermal_timer.timeout.connect(self.update_thermal)
+
         self.setup_ui()
+        self.update_gauges()
+        self.views.register(self.left_camera_label)
+        self.views.register(self.right_camera_label)
+        self.setup_watchdog()
+        self.watchdog_label.setText("Fail-safe: armed" if self.supervisor else "Fail-safe: off")
+
+        # Pick up configuration edits without restarting the control loop
+        self.config_timer = QTimer()
+        self.config_timer.timeout.connect(self.config.check_for_changes)
+        self.config_timer.start(1000)
+
+        # Sample measured positions and flush telemetry to disk
+        self.telemetry_timer = QTimer()
+        self.telemetry_timer.timeout.connect(self.sample_telemetry)
+        self.telemetry_timer.start(200)
+
+        if self.profile.thermal.enabled:
+            self.thermal_timer.start(self.profile.update_rate)
+
+    def setup_watchdog(self):
+        """Start the fail-safe supervisor with a heartbeat from the GUI thread."""
+        self.supervisor = None
+        settings = self.profile.watchdog
+        if not settings.enabled or not self.servo_controller:
+            return
+
+        keepalive = None
+        if settings.maestro_serial_timeout_ms:
+            try:
+                set_serial_timeout(settings.maestro_serial_timeout_ms)
+                keepalive = settings.maestro_serial_timeout_ms / 4000.0
+            except MaestroUsbError as e:
+                logger.warning("Could not set Maestro serial timeout: %s", e)
+
+        self.supervisor = Supervisor(
+            self.servo_controller, settings.action, settings.check_interval,
+            keepalive, on_trip=self.watchdog_tripped.emit)
+        self.watchdog_tripped.connect(self.handle_watchdog_trip)
+        self.supervisor.register('gui', settings.deadline)
+        self.supervisor.start()
+
+        self.heartbeat_timer = QTimer()
+        self.heartbeat_timer.timeout.connect(lambda: self.supervisor.heartbeat('gui'))
+        self.heartbeat_timer.start(max(10, int(settings.deadline * 1000 / 5)))
+
+    def handle_watchdog_trip(self, source, reaction):
+        """Show a watchdog trip and stop every motion source."""
+        self.stop_playback()
+        if self.controller.running:
+            self.toggle_controller()
+        self.watchdog_label.setText(
+            f"Fail-safe: {source} stalled ({reaction * 1000:.0f} ms)")
+        self.watchdog_label.setStyleSheet("QLabel { color: red; font-weight: bold; }")
+        self.watchdog_reset_button.setEnabled(True)
+
+    def reset_watchdog(self):
+        """Clear a watchdog trip and allow motion again."""
+        if self.supervisor:
+            self.supervisor.reset()
+        self.watchdog_label.setText("Fail-safe: armed" if self.supervisor else "Fail-safe: off")
+        self.watchdog_label.setStyleSheet("")
+        self.watchdog_reset_button.setEnabled(False)
+
+    def apply_profile(self, profile):
+        """Apply a reloaded configuration profile."""
+        logger.info("Configuration reloaded: %s", profile.name)
+        previous = self.profile
+        self.profile = profile
+        self.controller.apply_profile(profile)
+        if self.servo_controller:
+            self.servo_controller.apply_profile(profile)
+        # Only a changed configured speed overrides the operator's slider setting
+        if profile.speed_multiplier != previous.speed_multiplier:
+            self.speed_slider.setValue(int(round(profile.speed_multiplier * 10)))
+
+        if profile.thermal != previous.thermal:
+            # Keep the accumulated heat across parameter changes
+            thermal = ThermalModel.from_config(profile.thermal)
+            thermal.rise[:] = self.thermal.rise
+            thermal.over_budget[:] = self.thermal.over_budget
+            self.thermal = thermal
+        if not profile.thermal.enabled:
+            self.thermal_timer.stop()
+        elif (not self.thermal_timer.isActive()
+              or profile.update_rate != previous.update_rate):
+            self.thermal_timer.start(profile.update_rate)
 
     def update_robot(self, changes):
         """Handle controller updates and move the robot arm accordingly."""
-        # print(f"Updating robot with changes: {changes}")
-
-        for servo_name, change in changes.items():
+        now = time.monotonic()
+        if self.supervisor:
+            # Beats once per controller poll tick; see toggle_controller()
+            self.supervisor.heartbeat('control')
+        if self.last_update_time is not None:
+            self.telemetry.record('loop.interval', now - self.last_update_time, now)
+        self.last_update_time = now
+
+        if self.player is not None or self.thermal_action == 'park':
+            # Program playback or a thermal park owns the servos
+            return
+
+        profile = self.profile
+        for index, servo_name in enumerate(profile.names):
+            change = changes.get(servo_name, 0)
+            if servo_name == 'gripper' and change < 0 and self.thermal_action == 'relax':
+                # Do not close an overheated gripper again
+                change = 0
             if change != 0:
                 current = self.desired_angles.get(servo_name, 90)
                 # Apply servo limits
                 new_angle = max(
-                    self.servo_limits[servo_name]['min'],
-                    min(self.servo_limits[servo_name]['max'],
-                        current + change)
+                    profile.lower[index],
+                    min(profile.upper[index], current + change)
                 )
-                print(f"Setting {servo_name} from {current} to {new_angle}")
+                logger.debug("Setting %s from %.1f to %.1f", servo_name, current, new_angle)
                 self.desired_angles[servo_name] = new_angle
 
                 if self.servo_controller:
                     self.servo_controller.set_angle(servo_name, new_angle)
 
+        for servo_name in profile.names:
+            self.telemetry.record(f"{servo_name}.commanded", self.desired_angles[servo_name], now)
+
         self.update_gauges()
+        self.telemetry.record('loop.duration', time.monotonic() - now, now)
 
     def update_gauges(self):
         """Update gauge displays using desired angles."""
@@ -106,21 +249,210 @@ class RobotArmControlUI(QMainWindow):
     def toggle_controller(self):
         """Toggle PS4 controller on/off."""
         if not self.controller.running:
-            if self.controller.connect():
-                print("Starting controller")
-                self.controller.start()
-                self.controller_button.setText("Stop Controller")
+            # Devices are picked up as they connect, polling can start right away
+            logger.info("Starting controller")
+            self.controller.start()
+            self.controller_button.setText("Stop Controller")
+            if self.supervisor:
+                # A second heartbeat on the GUI thread: it trips when the poll
+                # timer or the control handler stalls while the GUI timer still
+                # runs. Silent input devices are held by the controller itself.
+                self.supervisor.register('control', self.profile.watchdog.deadline)
         else:
-            print("Stopping controller")
+            logger.info("Stopping controller")
+            if self.supervisor:
+                self.supervisor.unregister('control')
             self.controller.stop()
             self.controller_button.setText("Start Controller")
 
+    def handle_controller_button(self, button):
+        """Record a waypoint when the teach button is pressed in teach mode."""
+        if self.teach_mode and button == self.profile.teach_button:
+            self.record_waypoint()
+
+    def toggle_teach_mode(self):
+        """Toggle teach mode, where the controller's teach button stores waypoints."""
+        self.teach_mode = not self.teach_mode
+        self.teach_mode_button.setText("Stop Teaching" if self.teach_mode else "Teach Mode")
+
+    def record_waypoint(self):
+        """Store the current desired angles as the next program waypoint."""
+        self.program.add_waypoint(self.desired_angles, self.waypoint_duration)
+        logger.info("Recorded waypoint %d: %s", len(self.program), dict(self.desired_angles))
+        self.update_program_label()
+
+    def clear_program(self):
+        """Discard all taught waypoints."""
+        self.stop_playback()
+        self.program.clear()
+        self.update_program_label()
+
+    def update_program_label(self):
+        self.program_label.setText(f"Waypoints: {len(self.program)}")
+
+    def toggle_playback(self):
+        """Start or stop playing the taught program."""
+        if self.player is not None:
+            self.stop_playback()
+            return
+        if not len(self.program):
+            logger.warning("No waypoints to play")
+            return
+        if self.thermal_action == 'park':
+            logger.warning("Arm is parked to cool down, try again later")
+            return
+
+        self.program.loop = self.loop_checkbox.isChecked()
+        # Approach the first waypoint from the current pose; loops then cycle
+        start = [self.desired_angles[name] for name in self.profile.names]
+        compiled = compile_program(self.program, self.profile, start=start)
+        self.player = ProgramPlayer(compiled, self.servo_controller, on_sample=self.handle_program_sample)
+        self.player.start()
+        self.playback_timer.start(int(1000 / compiled.rate))
+        self.play_button.setText("Stop Program")
+
+    def step_playback(self):
+        if self.player is not None and not self.player.step():
+            self.stop_playback()
+
+    def stop_playback(self):
+        """Stop program playback and return control to the controller."""
+        self.playback_timer.stop()
+        if self.player is not None:
+            self.player.stop()
+            self.player = None
+        self.play_button.setText("Play Program")
+
+    def handle_program_sample(self, angles):
+        """Mirror the commanded program pose in the desired angles and gauges."""
+        now = time.monotonic()
+        for servo_name, angle in zip(self.profile.names, angles):
+            self.desired_angles[servo_name] = float(angle)
+            self.telemetry.record(f"{servo_name}.commanded", angle, now)
+        self.update_gauges()
+
+    def update_thermal(self):
+        """Advance the servo thermal model and act when a budget is exceeded."""
+        now = time.monotonic()
+        names = self.profile.names
+        # Limp or unconnected servos hold nothing; heating them from desired_angles
+        # would trip a false park or relax on the first command after a reset
+        powered = self.servo_controller is not None and not self.servo_controller.limp
+        over = self.thermal.update([self.desired_angles[name] for name in names], now, powered)
+        for index, servo_name in enumerate(names):
+            self.telemetry.record(f"{servo_name}.load", self.thermal.load[index], now)
+            self.telemetry.record(f"{servo_name}.heat", self.thermal.heat[index], now)
+
+        if over[3] and self.thermal_action is None:
+            self.relax_gripper()
+        if over[:3].any() and self.thermal_action != 'park':
+            self.park_arm()
+        elif not over.any() and self.thermal_action is not None:
+            logger.info("Servos cooled down, resuming normal control")
+            self.thermal_action = None
+            self.thermal_label.setText("Servo load: ok")
+            self.thermal_label.setStyleSheet("")
+
+    def relax_gripper(self):
+        """Open the gripper to where it stops pressing on the held object."""
+        index = self.profile.names.index('gripper')
+        angle = min(self.profile.upper[index],
+                    max(self.desired_angles['gripper'], self.thermal.load_model.grip_contact))
+        logger.warning("Gripper over its thermal budget, relaxing to %.1f", angle)
+        self.thermal_action = 'relax'
+        self.desired_angles['gripper'] = angle
+        if self.servo_controller:
+            self.servo_controller.set_angle('gripper', angle)
+        self.update_gauges()
+        self.thermal_label.setText("Servo load: gripper relaxed (hot)")
+        self.thermal_label.setStyleSheet("QLabel { color: orange; font-weight: bold; }")
+
+    def park_arm(self):
+        """Move the arm to its low-load park pose until the servos cool down."""
+        profile = self.profile
+        current = [self.desired_angles[name] for name in profile.names]
+        park = profile.thermal.park
+        if park is None:
+            pose = self.thermal.load_model.rest_pose(
+                profile.lower, profile.upper, base=current[0], gripper=current[3]).tolist()
+        else:
+            pose = [park.get(name, current[index]) for index, name in enumerate(profile.names)]
+        logger.warning("Arm over its thermal budget (heat %s), parking at %s",
+                       self.thermal.heat.round(2).tolist(), pose)
+
+        self.stop_playback()
+        self.thermal_action = 'park'
+        program = MotionProgram('park')
+        program.add_waypoint(pose, max(1.0, max(abs(a - b) for a, b in zip(pose, current)) / 30.0))
+        compiled = compile_program(program, profile, start=current)
+        self.player = ProgramPlayer(compiled, self.servo_controller, on_sample=self.handle_program_sample)
+        self.player.start()
+        self.playback_timer.start(int(1000 / compiled.rate))
+        self.thermal_label.setText("Servo load: arm parked (hot)")
+        self.thermal_label.setStyleSheet("QLabel { color: red; font-weight: bold; }")
+
+    def sample_telemetry(self):
+        """Record measured servo positions and periodically flush to disk."""
+        if self.servo_controller:
+            now = time.monotonic()
+            for servo_name in self.profile.names:
+                angle = self.servo_controller.get_measured_angle(servo_name)
+                if angle is not None:
+                    self.telemetry.record(f"{servo_name}.measured", angle, now)
+        now = time.monotonic()
+        self.telemetry.record('gui.render_load', self.views.load, now)
+        for camera_id, stages in self.camera_manager.pipeline_stats().items():
+            for stage_name, stats in stages.items():
+                prefix = f"camera{camera_id}.{stage_name}"
+                self.telemetry.record(f"{prefix}.latency_ms", stats['latency_ms'], now)
+                self.telemetry.record(f"{prefix}.fps", stats['fps'], now)
+        self.telemetry.maybe_flush()
+
+    def show_telemetry(self):
+        """Open the telemetry plot window."""
+        if self.telemetry_panel is None:
+            signals = [f"{name}.{kind}" for name in self.profile.names
+                       for kind in ('commanded', 'measured', 'load', 'heat')]
+            self.telemetry_panel = TelemetryPanel(self.telemetry, signals, view_manager=self.views)
+            self.telemetry_panel.resize(900, 500)
+        self.telemetry_panel.show()
+        self.telemetry_panel.raise_()
+
+    def save_program(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Program", "", "Robot Arm Programs (*.rap)")
+        if path:
+            self.program.loop = self.loop_checkbox.isChecked()
+            self.program.save(path)
+
+    def load_program(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Load Program", "", "Robot Arm Programs (*.rap)")
+        if not path:
+            return
+        try:
+            program = MotionProgram.load(path)
+        except (OSError, ValueError) as e:
+            logger.error("Error loading program: %s", e)
+            return
+        self.stop_playback()
+        self.program = program
+        self.loop_checkbox.setChecked(program.loop)
+        self.update_program_label()
+
+    def update_controller_status(self):
+        """Show the attached input devices and whether input is being held."""
+        names = [device.name for device in self.controller.devices.values()]
+        text = ", ".join(names) if names else "No controller"
+        if self.controller.running and self.controller.stale:
+            text += " (holding)"
+        self.controller_status_label.setText(text)
+
     def emergency_stop(self):
         """Reset all angles to middle of their range and stop controller."""
+        self.stop_playback()
         # Reset desired angles to middle of their range
-        for servo_name in self.desired_angles:
-            min_angle = self.servo_limits[servo_name]['min']
-            max_angle = self.servo_limits[servo_name]['max']
+        for index, servo_name in enumerate(self.profile.names):
+            min_angle = self.profile.lower[index]
+            max_angle = self.profile.upper[index]
             middle_angle = (min_angle + max_angle) // 2
             self.desired_angles[servo_name] = middle_angle
         
@@ -129,8 +461,7 @@ class RobotArmControlUI(QMainWindow):
             self.servo_controller.emergency_stop()
         
         if self.controller.running:
-            self.controller.stop()
-            self.controller_button.setText("Start Controller")
+            self.toggle_controller()
         
         # Update gauges to show reset position
         self.update_gauges()
@@ -184,6 +515,15 @@ class RobotArmControlUI(QMainWindow):
         camera_layout.addWidget(left_camera_widget, stretch=1)
         camera_layout.addWidget(right_camera_widget, stretch=1)
 
+        # Synchronized stereo capture of both selected cameras
+        stereo_widget = QWidget()
+        stereo_layout = QHBoxLayout(stereo_widget)
+        self.stereo_button = QPushButton("Start Stereo")
+        self.stereo_button.clicked.connect(self.toggle_stereo)
+        self.skew_label = QLabel("Skew: -")
+        stereo_layout.addWidget(self.stereo_button)
+        stereo_layout.addWidget(self.skew_label, stretch=1)
+
         # Gauge section (takes less space)
         gauge_widget = QWidget()
         gauge_widget.setMaximumWidth(300)  # Limit gauge section width
@@ -273,20 +613,64 @@ class RobotArmControlUI(QMainWindow):
         self.emergency_stop_button.clicked.connect(self.emergency_stop)
         self.emergency_stop_button.setStyleSheet("QPushButton { background-color: red; color: white; font-weight: bold; }")
         
+        self.telemetry_button = QPushButton("Telemetry")
+        self.telemetry_button.setMinimumHeight(40)
+        self.telemetry_button.clicked.connect(self.show_telemetry)
+
+        self.controller_status_label = QLabel()
+        self.update_controller_status()
+
+        self.watchdog_label = QLabel()
+        self.watchdog_reset_button = QPushButton("Reset Fail-safe")
+        self.watchdog_reset_button.setMinimumHeight(40)
+        self.watchdog_reset_button.setEnabled(False)
+        self.watchdog_reset_button.clicked.connect(self.reset_watchdog)
+
+        self.thermal_label = QLabel("Servo load: ok")
+
         button_layout.addWidget(self.controller_button)
+        button_layout.addWidget(self.controller_status_label)
         button_layout.addWidget(self.emergency_stop_button)
+        button_layout.addWidget(self.telemetry_button)
+        button_layout.addWidget(self.watchdog_label)
+        button_layout.addWidget(self.watchdog_reset_button)
+        button_layout.addWidget(self.thermal_label)
+
+        # Teach-and-playback controls
+        program_layout = QHBoxLayout()
+        program_layout.setSpacing(10)
+        self.waypoint_duration = 1.0  # seconds to reach each taught waypoint
+
+        self.teach_mode_button = QPushButton("Teach Mode")
+        self.teach_mode_button.clicked.connect(self.toggle_teach_mode)
+        record_button = QPushButton("Record Waypoint")
+        record_button.clicked.connect(self.record_waypoint)
+        clear_button = QPushButton("Clear")
+        clear_button.clicked.connect(self.clear_program)
+        self.play_button = QPushButton("Play Program")
+        self.play_button.clicked.connect(self.toggle_playback)
+        self.loop_checkbox = QCheckBox("Loop")
+        save_button = QPushButton("Save")
+        save_button.clicked.connect(self.save_program)
+        load_button = QPushButton("Load")
+        load_button.clicked.connect(self.load_program)
+        self.program_label = QLabel("Waypoints: 0")
+
+        for widget in (self.teach_mode_button, record_button, clear_button, self.play_button,
+                       self.loop_checkbox, save_button, load_button, self.program_label):
+            program_layout.addWidget(widget)
         
         # Right side - speed control
         speed_layout = QHBoxLayout()
         speed_layout.setSpacing(10)
         
         speed_label = QLabel("Speed:")
-        self.speed_value_label = QLabel("5.0x")  # Initial value
+        self.speed_value_label = QLabel(f"{self.controller.get_speed_multiplier():.1f}x")  # Initial value
         self.speed_value_label.setMinimumWidth(50)
         self.speed_slider = QSlider(Qt.Horizontal)
         self.speed_slider.setMinimum(1)  # 0.1x
         self.speed_slider.setMaximum(200)  # 20.0x
-        self.speed_slider.setValue(40)  # 4.0x
+        self.speed_slider.setValue(int(round(self.controller.get_speed_multiplier() * 10)))
         self.speed_slider.valueChanged.connect(self.update_speed)
         
         speed_layout.addWidget(speed_label)
@@ -299,6 +683,8 @@ class RobotArmControlUI(QMainWindow):
 
         # Add layouts to main layout
         main_layout.addLayout(top_layout, stretch=1)
+        main_layout.addWidget(stereo_widget)
+        main_layout.addLayout(program_layout)
         main_layout.addLayout(controls_layout)
 
     def toggle_camera(self, side):
@@ -321,8 +707,52 @@ class RobotArmControlUI(QMainWindow):
             label.clear()
             button.setText("Start Camera")
 
+    def toggle_stereo(self):
+        """Toggle synchronized capture of the left and right cameras."""
+        if self.camera_manager.synchronized is None:
+            # Free-running streams hold the devices, release them first
+            for side in ("left", "right"):
+                if self.active_cameras[side] is not None:
+                    self.toggle_camera(side)
+
+            left_id = int(self.left_camera_combo.currentText().split()[-1])
+            right_id = int(self.right_camera_combo.currentText().split()[-1])
+            stereo_thread = self.camera_manager.start_synchronized(left_id, right_id)
+            stereo_thread.frames_ready.connect(self.update_stereo_feed)
+            stereo_thread.error.connect(self.handle_stereo_error)
+            self.left_camera_button.setEnabled(False)
+            self.right_camera_button.setEnabled(False)
+            self.stereo_button.setText("Stop Stereo")
+        else:
+            self.stop_stereo()
+
+    def stop_stereo(self):
+        """Stop synchronized capture and restore the per-camera controls."""
+        self.camera_manager.stop_synchronized()
+        self.left_camera_label.clear()
+        self.right_camera_label.clear()
+        self.left_camera_button.setEnabled(True)
+        self.right_camera_button.setEnabled(True)
+        self.stereo_button.setText("Start Stereo")
+        self.skew_label.setText("Skew: -")
+
+    def update_stereo_feed(self, left_frame, right_frame, skew):
+        """Display a synchronized frame pair and its measured skew."""
+        self.update_camera_feed(left_frame, self.left_camera_label)
+        self.update_camera_feed(right_frame, self.right_camera_label)
+        self.skew_label.setText(f"Skew: {skew * 1000:.1f} ms")
+
+    def handle_stereo_error(self, error_msg):
+        """Handle synchronized capture errors."""
+        logger.error("Stereo camera error: %s", error_msg)
+        self.stop_stereo()
+        self.skew_label.setText(f"Stereo Error: {error_msg}")
+
     def update_camera_feed(self, frame, label):
         """Update camera feed with proper scaling."""
+        if not self.views.should_update(label):
+            return
+        start = time.monotonic()
         try:
             # Convert BGR to RGB
             rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -333,20 +763,23 @@ class RobotArmControlUI(QMainWindow):
             q_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
             pixmap = QPixmap.fromImage(q_image)
             
-            # Scale pixmap to fit label while maintaining aspect ratio
-            label_size = label.size()
-            scaled_pixmap = pixmap.scaled(
-                label_size,
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
+            # Scale pixmap to fit label while maintaining aspect ratio,
+            # smooth scaling only while drawing is a small share of GUI time
+            width, height = self.views.size(label)
+            if (width, height) != (w, h):
+                pixmap = pixmap.scaled(
+                    width, height,
+                    Qt.AspectRatioMode.KeepAspectRatio,
+                    self.views.transformation()
+                )
             
             # Center the scaled pixmap in the label
             label.setAlignment(Qt.AlignCenter)
-            label.setPixmap(scaled_pixmap)
+            label.setPixmap(pixmap)
             
         except Exception as e:
-            print(f"Error updating camera feed: {e}")
+            logger.exception("Error updating camera feed: %s", e)
+        self.views.record_render(time.monotonic() - start)
 
     def update_speed(self):
         """Update the movement speed multiplier."""
@@ -355,7 +788,17 @@ class RobotArmControlUI(QMainWindow):
         self.speed_value_label.setText(f"{speed:.1f}x")
 
     def closeEvent(self, event):
-        self.camera_manager.stop_all_cameras()
+        self.config_timer.stop()
+        self.telemetry_timer.stop()
+        self.thermal_timer.stop()
+        if self.supervisor:
+            self.heartbeat_timer.stop()
+            self.supervisor.stop()
+        self.stop_playback()
+        if self.telemetry_panel is not None:
+            self.telemetry_panel.close()
+        self.telemetry.close()
+        self.camera_manager.close()
         if self.controller.running:
             self.controller.stop()
         if self.servo_controller:
@@ -363,7 +806,12 @@ class RobotArmControlUI(QMainWindow):
         event.accept()
 
 if __name__ == '__main__':
+    log_config = load_logging_config()
+    setup_logging(log_config.level, log_config.modules,
+                  log_config.debug_rate_limit, log_config.binary_log)
     app = QApplication(sys.argv)
     window = RobotArmControlUI()
     window.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    shutdown_logging()
+    sys.exit(exit_code)
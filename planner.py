@@ -0,0 +1,355 @@
+import hashlib
+import heapq
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+from kinematics import ArmGeometry, link_points
+from program import MotionProgram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENVIRONMENT_PATH = 'environment.json'
+DEFAULT_ROADMAP_DIR = 'roadmaps'
+# Base, shoulder and elbow move the links; the gripper is carried along
+ARM_JOINTS = 3
+
+
+class PlanningError(ValueError):
+    """Raised when no collision-free path can be found."""
+
+
+class Environment:
+    """
+    Static obstacles as axis-aligned boxes and vertical cylinders, in mm.
+
+    `boxes` is an (n, 6) array of (xmin, ymin, zmin, xmax, ymax, zmax) and
+    `cylinders` an (m, 5) array of (x, y, radius, zmin, zmax).
+    """
+
+    def __init__(self, boxes=(), cylinders=()):
+        self.boxes = np.asarray(boxes, dtype=float).reshape(-1, 6)
+        self.cylinders = np.asarray(cylinders, dtype=float).reshape(-1, 5)
+
+    @classmethod
+    def from_dict(cls, data):
+        boxes = [list(box['min']) + list(box['max']) for box in data.get('boxes', [])]
+        cylinders = [list(cyl['center']) + [cyl['radius']] + list(cyl['z'])
+                     for cyl in data.get('cylinders', [])]
+        return cls(boxes, cylinders)
+
+    @classmethod
+    def load(cls, path=DEFAULT_ENVIRONMENT_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def key(self):
+        return self.boxes.tobytes() + self.cylinders.tobytes()
+
+    def collides(self, points, margin=0.0):
+        """
+        Test points (..., P, 3) against every obstacle grown by `margin`.
+        Returns a bool array over the leading dimensions.
+        """
+        hit = np.zeros(points.shape[:-2], dtype=bool)
+        p = points[..., None, :]
+        if len(self.boxes):
+            inside = ((p >= self.boxes[:, :3] - margin) & (p <= self.boxes[:, 3:] + margin)).all(-1)
+            hit |= inside.any(axis=(-2, -1))
+        if len(self.cylinders):
+            cyl = self.cylinders
+            radial = np.hypot(p[..., 0] - cyl[:, 0], p[..., 1] - cyl[:, 1]) <= cyl[:, 2] + margin
+            height = (p[..., 2] >= cyl[:, 3] - margin) & (p[..., 2] <= cyl[:, 4] + margin)
+            hit |= (radial & height).any(axis=(-2, -1))
+        return hit
+
+
+class RoadmapPlanner:
+    """
+    Probabilistic roadmap (PRM) over the base, shoulder and elbow angles.
+
+    build() samples collision-free poses within the profile's joint limits,
+    links each to its nearest neighbours and keeps the edges whose
+    interpolated poses are all collision-free. Edges are checked in batches
+    with one vectorized forward-kinematics and obstacle pass per batch.
+    Obstacles are grown by the link radius plus half the most any link point
+    can travel between two samples, so a collision cannot slip between them. The
+    roadmap is cached as .npz under `cache_dir`, keyed by a hash of the
+    limits, geometry, environment and sampling settings, so later runs only
+    load it. A query connects start and goal to the roadmap, runs A* and
+    shortcuts the result, typically in a few milliseconds.
+    """
+
+    def __init__(self, profile, environment=None, geometry=None, samples=800, neighbours=10,
+                 resolution=1.0, cache_dir=DEFAULT_ROADMAP_DIR, seed=0, batch_size=4096):
+        self.profile = profile
+        self.environment = environment if environment is not None else Environment()
+        self.geometry = geometry or ArmGeometry()
+        self.samples = samples
+        self.neighbours = neighbours
+        self.resolution = resolution
+        self.cache_dir = cache_dir
+        self.seed = seed
+        self.batch_size = batch_size
+        self.lower = np.asarray(profile.lower[:ARM_JOINTS], dtype=float)
+        self.upper = np.asarray(profile.upper[:ARM_JOINTS], dtype=float)
+        geometry = self.geometry
+        reach = geometry.upper_arm + geometry.forearm + geometry.gripper
+        # Every joint moves at most `resolution` degrees per sample
+        self.margin = geometry.link_radius + 0.5 * ARM_JOINTS * reach * np.radians(resolution)
+        self.nodes = None
+        self.indptr = None
+        self.indices = None
+        self.costs = None
+
+    def cache_key(self):
+        digest = hashlib.sha1()
+        digest.update(self.lower.tobytes() + self.upper.tobytes())
+        digest.update(repr(self.geometry.key()).encode())
+        digest.update(self.environment.key())
+        digest.update(repr((self.samples, self.neighbours, self.resolution, self.seed)).encode())
+        return digest.hexdigest()[:16]
+
+    def cache_path(self):
+        return os.path.join(self.cache_dir, f"roadmap_{self.cache_key()}.npz")
+
+    # Collision checks
+
+    def in_collision(self, poses):
+        """Collision flags for arm poses of shape (n, 3) or (n, 4)."""
+        poses = np.asarray(poses, dtype=float)
+        q = np.zeros((len(poses), 4))
+        q[:, :ARM_JOINTS] = poses[:, :ARM_JOINTS]
+        points = link_points(q, self.geometry)
+        return self.environment.collides(points, self.margin)
+
+    def edges_free(self, a, b):
+        """
+        Check straight joint-space edges a[i] -> b[i] (each (n, 3)) at
+        `resolution` degrees. Returns a bool array, True where the edge is free.
+        """
+        a = np.asarray(a, dtype=float)[:, :ARM_JOINTS]
+        b = np.asarray(b, dtype=float)[:, :ARM_JOINTS]
+        free = np.ones(len(a), dtype=bool)
+        if not len(a):
+            return free
+        lengths = np.abs(b - a).max(axis=1)
+        steps = max(2, int(np.ceil(lengths.max() / self.resolution)) + 1)
+        t = np.linspace(0.0, 1.0, steps)[:, None]
+        per_batch = max(1, self.batch_size // steps)
+        for start in range(0, len(a), per_batch):
+            end = start + per_batch
+            poses = a[start:end, None, :] + (b[start:end] - a[start:end])[:, None, :] * t
+            hit = self.in_collision(poses.reshape(-1, ARM_JOINTS)).reshape(-1, steps)
+            free[start:end] = ~hit.any(axis=1)
+        return free
+
+    # Roadmap
+
+    def load_or_build(self):
+        """Load the cached roadmap for this setup, building and saving it if missing."""
+        path = self.cache_path()
+        if os.path.exists(path):
+            with np.load(path) as data:
+                self.nodes = data['nodes']
+                self.indptr = data['indptr']
+                self.indices = data['indices']
+                self.costs = data['costs']
+            logger.info("Loaded roadmap %s (%d nodes, %d edges)",
+                        path, len(self.nodes), len(self.indices) // 2)
+            return self
+        self.build()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        np.savez(path, nodes=self.nodes, indptr=self.indptr, indices=self.indices, costs=self.costs)
+        return self
+
+    def build(self):
+        start_time = time.perf_counter()
+        rng = np.random.default_rng(self.seed)
+        nodes = np.empty((0, ARM_JOINTS))
+        for _ in range(100):
+            candidates = rng.uniform(self.lower, self.upper, size=(self.samples, ARM_JOINTS))
+            nodes = np.concatenate((nodes, candidates[~self.in_collision(candidates)]))
+            if len(nodes) >= self.samples:
+                break
+        else:
+            raise PlanningError("Joint limits leave almost no collision-free poses")
+        nodes = nodes[:self.samples]
+
+        # k nearest neighbours from the full distance matrix
+        k = min(self.neighbours, len(nodes) - 1)
+        distances = np.linalg.norm(nodes[:, None, :] - nodes[None, :, :], axis=-1)
+        np.fill_diagonal(distances, np.inf)
+        nearest = np.argpartition(distances, k, axis=1)[:, :k]
+        pairs = np.stack((np.repeat(np.arange(len(nodes)), k), nearest.ravel()), axis=1)
+        pairs = np.unique(np.sort(pairs, axis=1), axis=0)
+
+        pairs = pairs[self.edges_free(nodes[pairs[:, 0]], nodes[pairs[:, 1]])]
+        self._set_graph(nodes, pairs)
+        logger.info("Built roadmap: %d nodes, %d edges in %.2f s",
+                    len(nodes), len(pairs), time.perf_counter() - start_time)
+        return self
+
+    def _set_graph(self, nodes, pairs):
+        # Undirected edges in compressed sparse row form
+        both = np.concatenate((pairs, pairs[:, ::-1]))
+        both = both[np.argsort(both[:, 0], kind='stable')]
+        self.nodes = nodes
+        self.indices = both[:, 1].astype(np.int32)
+        self.indptr = np.searchsorted(both[:, 0], np.arange(len(nodes) + 1)).astype(np.int32)
+        self.costs = np.linalg.norm(nodes[both[:, 0]] - nodes[both[:, 1]], axis=1)
+
+    # Queries
+
+    def _connect(self, pose):
+        """Roadmap nodes reachable from `pose` by a free edge, with their costs."""
+        distances = np.linalg.norm(self.nodes - pose, axis=1)
+        k = min(self.neighbours * 2, len(self.nodes))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        free = self.edges_free(np.repeat(pose[None, :], len(nearest), axis=0), self.nodes[nearest])
+        return nearest[free], distances[nearest[free]]
+
+    def _search(self, start, goal):
+        """A* from start to goal through the roadmap. Returns the pose list or None."""
+        start_nodes, start_costs = self._connect(start)
+        goal_nodes, goal_costs = self._connect(goal)
+        if not len(start_nodes) or not len(goal_nodes):
+            return None
+        goal_links = dict(zip(goal_nodes.tolist(), goal_costs.tolist()))
+        heuristic = np.linalg.norm(self.nodes - goal, axis=1)
+        indptr, indices, costs = self.indptr, self.indices, self.costs
+
+        best = {}
+        parents = {}
+        queue = []
+        for node, cost in zip(start_nodes.tolist(), start_costs.tolist()):
+            best[node] = cost
+            parents[node] = -1
+            heapq.heappush(queue, (cost + heuristic[node], cost, node))
+
+        goal_cost, goal_parent = np.inf, None
+        while queue:
+            estimate, cost, node = heapq.heappop(queue)
+            if estimate >= goal_cost:
+                break
+            if cost > best[node]:
+                continue
+            if node in goal_links and cost + goal_links[node] < goal_cost:
+                goal_cost, goal_parent = cost + goal_links[node], node
+            for edge in range(indptr[node], indptr[node + 1]):
+                neighbour = int(indices[edge])
+                new_cost = cost + costs[edge]
+                if new_cost < best.get(neighbour, np.inf):
+                    best[neighbour] = new_cost
+                    parents[neighbour] = node
+                    heapq.heappush(queue, (new_cost + heuristic[neighbour], new_cost, neighbour))
+
+        if goal_parent is None:
+            return None
+        path = []
+        node = goal_parent
+        while node != -1:
+            path.append(self.nodes[node])
+            node = parents[node]
+        return [start] + path[::-1] + [goal]
+
+    def shortcut(self, path):
+        """Greedily skip waypoints while the direct edge stays collision-free."""
+        path = np.asarray(path)
+        kept = [0]
+        i = 0
+        while i < len(path) - 1:
+            later = np.arange(i + 1, len(path))
+            free = self.edges_free(np.repeat(path[i:i + 1], len(later), axis=0), path[later])
+            i = int(later[free].max()) if free.any() else i + 1
+            kept.append(i)
+        return path[kept]
+
+    def plan(self, start, goal):
+        """
+        Plan a collision-free path between two full poses (one angle per
+        servo). Returns an (n, 4) array of waypoints including start and goal;
+        the gripper moves linearly along the path.
+        """
+        if self.nodes is None:
+            self.load_or_build()
+        start = np.asarray(start, dtype=float)
+        goal = np.asarray(goal, dtype=float)
+        arm_start = np.clip(start[:ARM_JOINTS], self.lower, self.upper)
+        arm_goal = np.clip(goal[:ARM_JOINTS], self.lower, self.upper)
+        if self.in_collision(arm_start[None, :])[0]:
+            raise PlanningError("Start pose is in collision")
+        if self.in_collision(arm_goal[None, :])[0]:
+            raise PlanningError("Goal pose is in collision")
+
+        if self.edges_free(arm_start[None, :], arm_goal[None, :])[0]:
+            arm_path = np.stack((arm_start, arm_goal))
+        else:
+            arm_path = self._search(arm_start, arm_goal)
+            if arm_path is None:
+                raise PlanningError("No collision-free path found in the roadmap")
+            arm_path = self.shortcut(arm_path)
+
+        # Spread the gripper change over the path by joint-space distance
+        travelled = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(arm_path, axis=0), axis=1))))
+        fraction = travelled / travelled[-1] if travelled[-1] > 0 else np.linspace(0.0, 1.0, len(arm_path))
+        gripper = start[ARM_JOINTS] + (goal[ARM_JOINTS] - start[ARM_JOINTS]) * fraction
+        return np.column_stack((arm_path, gripper))
+
+
+def path_to_program(path, max_speed=60.0, name='planned'):
+    """
+    Turn a planned path into a MotionProgram for compile_program().
+
+    The first row is the start pose and not a waypoint; pass it as
+    compile_program's `start`. Each segment is timed so that no joint
+    exceeds `max_speed` degrees per second at the peak of the
+    minimum-jerk profile (1.875 times its average speed).
+    """
+    program = MotionProgram(name)
+    for previous, waypoint in zip(path[:-1], path[1:]):
+        distance = float(np.abs(waypoint - previous).max())
+        program.add_waypoint(waypoint.tolist(), max(distance * 1.875 / max_speed, 0.02))
+    return program
+
+
+def benchmark_planner(queries=200, cache_dir=DEFAULT_ROADMAP_DIR):
+    """
+    Build (or load) the roadmap for the default profile and environment,
+    then time random point-to-point queries. Returns (build or load seconds,
+    mean query milliseconds, solved fraction).
+    """
+    from config import ConfigStore
+
+    profile = ConfigStore().compiled
+    environment = Environment.load() if os.path.exists(DEFAULT_ENVIRONMENT_PATH) else Environment()
+    planner = RoadmapPlanner(profile, environment, cache_dir=cache_dir)
+    start_time = time.perf_counter()
+    planner.load_or_build()
+    build_time = time.perf_counter() - start_time
+
+    rng = np.random.default_rng(1)
+    lower, upper = np.asarray(profile.lower), np.asarray(profile.upper)
+    poses = rng.uniform(lower, upper, size=(queries * 4, len(lower)))
+    poses = poses[~planner.in_collision(poses)]
+    solved = 0
+    total = 0
+    count = min(queries, len(poses) // 2)
+    for i in range(count):
+        start_time = time.perf_counter()
+        try:
+            planner.plan(poses[2 * i], poses[2 * i + 1])
+            solved += 1
+        except PlanningError:
+            pass
+        total += time.perf_counter() - start_time
+    return build_time, total / max(count, 1) * 1000, solved / max(count, 1)
+
+
+if __name__ == "__main__":
+    # Same as `python -m robot_arm_control bench planner`
+    from robot_arm_control import main
+    raise SystemExit(main(['bench', 'planner']))
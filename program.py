@@ -0,0 +1,258 @@
+import struct
+import time
+
+import numpy as np
+
+from config import SERVO_NAMES
+
+PROGRAM_MAGIC = b'RAPG'
+PROGRAM_VERSION = 1
+# magic, version, flags, joint count, waypoint count, name length
+_HEADER = struct.Struct('<4sHBBIH')
+_FLAG_LOOP = 0x01
+
+
+class MotionProgram:
+    """
+    A taught sequence of joint-space waypoints.
+
+    Each waypoint holds one angle per joint in SERVO_NAMES order and the time
+    in seconds to move there from the previous waypoint. The first waypoint's
+    duration is how long playback takes to reach it from the first sample.
+    """
+
+    def __init__(self, name='program', loop=False):
+        self.name = name
+        self.loop = loop
+        self.waypoints = []
+        self.durations = []
+
+    def __len__(self):
+        return len(self.waypoints)
+
+    def add_waypoint(self, angles, duration=1.0):
+        """Append a waypoint from a {'servo': angle} dict or a sequence."""
+        if isinstance(angles, dict):
+            angles = [angles[name] for name in SERVO_NAMES]
+        if len(angles) != len(SERVO_NAMES):
+            raise ValueError(f"Expected {len(SERVO_NAMES)} joint angles, got {len(angles)}")
+        if duration < 0:
+            raise ValueError("Waypoint duration must not be negative")
+        self.waypoints.append([float(a) for a in angles])
+        self.durations.append(float(duration))
+
+    def clear(self):
+        """Remove all waypoints."""
+        self.waypoints = []
+        self.durations = []
+
+    def save(self, path):
+        """Write the program in the compact binary .rap format."""
+        name = self.name.encode('utf-8')
+        flags = _FLAG_LOOP if self.loop else 0
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(PROGRAM_MAGIC, PROGRAM_VERSION, flags,
+                                 len(SERVO_NAMES), len(self.waypoints), len(name)))
+            f.write(name)
+            f.write(np.asarray(self.waypoints, dtype='<f4').reshape(-1, len(SERVO_NAMES)).tobytes())
+            f.write(np.asarray(self.durations, dtype='<f4').tobytes())
+
+    @classmethod
+    def load(cls, path):
+        """Read a program written by save()."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < _HEADER.size:
+            raise ValueError(f"{path} is not a motion program")
+        magic, version, flags, joints, count, name_len = _HEADER.unpack_from(data)
+        if magic != PROGRAM_MAGIC:
+            raise ValueError(f"{path} is not a motion program")
+        if version != PROGRAM_VERSION:
+            raise ValueError(f"Unsupported program version {version}")
+        if joints != len(SERVO_NAMES):
+            raise ValueError(f"Program has {joints} joints, expected {len(SERVO_NAMES)}")
+
+        offset = _HEADER.size
+        name = data[offset:offset + name_len].decode('utf-8')
+        offset += name_len
+        waypoints = np.frombuffer(data, dtype='<f4', count=count * joints, offset=offset)
+        offset += waypoints.nbytes
+        durations = np.frombuffer(data, dtype='<f4', count=count, offset=offset)
+
+        program = cls(name, loop=bool(flags & _FLAG_LOOP))
+        program.waypoints = waypoints.reshape(count, joints).astype(float).tolist()
+        program.durations = durations.astype(float).tolist()
+        return program
+
+
+class CompiledProgram:
+    """
+    Dense, time-stamped playback arrays for a MotionProgram.
+
+    `angles` is (samples, joints) in degrees and `targets` the matching
+    Maestro targets in quarter-microseconds, so playback only indexes rows.
+    Samples before `loop_start` are the approach from the start pose and
+    are only played once; a looping player repeats the rest.
+    """
+
+    def __init__(self, name, rate, angles, targets, channels, loop, loop_start=0):
+        self.name = name
+        self.rate = rate
+        self.angles = angles
+        self.targets = targets
+        self.channels = channels
+        self.loop = loop
+        self.loop_start = loop_start
+        self.times = np.arange(len(angles)) / rate
+
+    def __len__(self):
+        return len(self.angles)
+
+    @property
+    def duration(self):
+        return len(self.angles) / self.rate
+
+
+def min_jerk(s):
+    """Minimum-jerk blend from 0 to 1 over s in [0, 1]."""
+    return s * s * s * (10 - 15 * s + 6 * s * s)
+
+
+def angles_to_targets(angles, profile):
+    """Convert an array of joint angles to clamped Maestro targets."""
+    targets = profile.servo_min + np.asarray(angles) * profile.target_scale
+    return np.rint(np.clip(targets, profile.servo_min, profile.servo_max)).astype(np.uint16)
+
+
+def compile_program(program, profile, rate=50.0, start=None):
+    """
+    Compile a MotionProgram into a CompiledProgram sampled at `rate` Hz.
+
+    Segments are interpolated with a minimum-jerk profile and clamped to the
+    joint limits of `profile` (a CompiledProfile). `start` is the pose the
+    first segment begins from, normally the arm's current pose. Without it,
+    playback starts at the last waypoint for looping programs (so the cycle
+    closes smoothly) and at the first one otherwise. A looping program with
+    a `start` approaches the first waypoint once, then cycles through the
+    waypoints and back to the first.
+    """
+    if not len(program):
+        raise ValueError("Cannot compile an empty program")
+
+    waypoints = np.asarray(program.waypoints, dtype=float)
+    waypoints = np.clip(waypoints, profile.lower, profile.upper)
+    durations = list(program.durations)
+    approach = start is not None and program.loop
+    if start is None:
+        previous = waypoints[-1] if program.loop else waypoints[0]
+    else:
+        previous = np.clip(np.asarray(start, dtype=float), profile.lower, profile.upper)
+        if approach:
+            # Approach segment, then a cycle that ends back at the first waypoint
+            waypoints = np.concatenate((waypoints, waypoints[:1]))
+            durations.append(durations[0])
+
+    segments = []
+    for waypoint, duration in zip(waypoints, durations):
+        steps = max(1, int(round(duration * rate)))
+        s = min_jerk(np.arange(1, steps + 1) / steps)[:, None]
+        segments.append(previous + (waypoint - previous) * s)
+        previous = waypoint
+    loop_start = len(segments[0]) if approach else 0
+
+    angles = np.concatenate(segments).astype(np.float32)
+    targets = angles_to_targets(angles, profile)
+    return CompiledProgram(program.name, float(rate), angles, targets,
+                           profile.channels, program.loop, loop_start)
+
+
+class ProgramPlayer:
+    """
+    Stream a CompiledProgram to a MaestroController.
+
+    step() is cheap and can be driven from a QTimer or a plain loop. The
+    sample index comes from elapsed wall-clock time, so a late tick skips
+    ahead instead of stretching the program.
+    """
+
+    def __init__(self, compiled, servo_controller, loop=None, on_sample=None):
+        self.compiled = compiled
+        self.servo_controller = servo_controller
+        self.loop = compiled.loop if loop is None else loop
+        self.on_sample = on_sample
+        self.playing = False
+        self.index = -1
+        self.cycles = 0
+        self._start_time = 0.0
+
+    def start(self, now=None):
+        """Start playback from the first sample."""
+        self._start_time = time.monotonic() if now is None else now
+        self.index = -1
+        self.cycles = 0
+        self.playing = True
+
+    def stop(self):
+        """Stop playback, leaving the servos at the last sample."""
+        self.playing = False
+
+    def step(self, now=None):
+        """Send the sample due at `now`. Returns False once playback is over."""
+        if not self.playing:
+            return False
+        now = time.monotonic() if now is None else now
+        compiled = self.compiled
+        count = len(compiled)
+        position = int((now - self._start_time) * compiled.rate)
+
+        if position >= count:
+            if self.loop:
+                # Later cycles skip the approach from the start pose
+                loop_start = compiled.loop_start
+                self.cycles, position = divmod(position - loop_start, count - loop_start)
+                position += loop_start
+            else:
+                position = count - 1
+                self.playing = False
+
+        if position != self.index:
+            self.index = position
+            if self.servo_controller:
+                self.servo_controller.set_targets(compiled.channels, compiled.targets[position])
+            if self.on_sample:
+                self.on_sample(compiled.angles[position])
+        return self.playing
+
+    def run(self, stop_event=None):
+        """Play to completion (or until stop_event is set) in the calling thread."""
+        self.start()
+        period = 1.0 / self.compiled.rate
+        while self.step():
+            if stop_event is not None and stop_event.is_set():
+                self.stop()
+                break
+            time.sleep(period)
+
+
+def benchmark_program(waypoints=100, steps=100000):
+    """
+    Compile a looping program for the default profile and time playback
+    steps. Returns (samples, compile milliseconds, microseconds per step).
+    """
+    from config import ConfigStore
+
+    profile = ConfigStore().compiled
+    program = MotionProgram('bench', loop=True)
+    for i in range(waypoints):
+        program.add_waypoint([home + (i % 2) * 5 for home in profile.home], 1.0)
+    start = time.perf_counter()
+    compiled = compile_program(program, profile)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    player = ProgramPlayer(compiled, None)
+    player.start(now=0.0)
+    start = time.perf_counter()
+    for i in range(steps):
+        player.step(now=i / compiled.rate)
+    step_us = (time.perf_counter() - start) / steps * 1e6
+    return len(compiled), compile_ms, step_us
@@ -0,0 +1,313 @@
+"""
+Headless command-line runner for the robot arm.
+
+    python -m robot_arm_control jog base 10
+    python -m robot_arm_control goto base=90 shoulder=120 --duration 2
+    python -m robot_arm_control goto base=30 elbow=110 --plan
+    python -m robot_arm_control run-program cycle.rap --loop
+    python -m robot_arm_control script compile cycle.rap -o cycle.txt
+    python -m robot_arm_control script run --count 10
+    python -m robot_arm_control probe-cameras
+    python -m robot_arm_control bench
+
+Each subcommand imports only what it needs: nothing here pulls in Qt or
+pygame, and OpenCV is only loaded by probe-cameras and the undistort benchmark.
+"""
+import argparse
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+BENCHMARKS = ('conditioning', 'watchdog', 'program', 'planner', 'thermal', 'pipeline', 'undistort')
+
+
+def _load_profile(args):
+    from config import ConfigStore
+
+    store = ConfigStore(args.config, args.profile) if args.config else ConfigStore(profile=args.profile)
+    return store.compiled
+
+
+def _connect(args, profile):
+    from maestro_controller import MaestroController
+
+    if not args.port:
+        return MaestroController(profile=profile)
+    controller = MaestroController(port=args.port, device_number=profile.device_number)
+    controller.apply_profile(profile)
+    return controller
+
+
+def _current_pose(controller, profile):
+    """Measured joint angles, falling back to the home pose if a read fails."""
+    pose = []
+    for index, name in enumerate(profile.names):
+        angle = controller.get_measured_angle(name)
+        pose.append(profile.home[index] if angle is None else angle)
+    return pose
+
+
+def _play(controller, program, profile, args, start=None):
+    from program import ProgramPlayer, compile_program
+
+    compiled = compile_program(program, profile, rate=args.rate, start=start)
+    player = ProgramPlayer(compiled, controller)
+    logger.info("Playing '%s': %d samples, %.2f s%s", compiled.name, len(compiled),
+                compiled.duration, " (looping)" if player.loop else "")
+    try:
+        player.run()
+    except KeyboardInterrupt:
+        player.stop()
+        logger.info("Stopped after %d cycles", player.cycles)
+
+
+def cmd_jog(args):
+    profile = _load_profile(args)
+    if args.servo not in profile.names:
+        raise SystemExit(f"Unknown servo '{args.servo}', expected one of {', '.join(profile.names)}")
+    index = profile.names.index(args.servo)
+    controller = _connect(args, profile)
+    try:
+        current = _current_pose(controller, profile)[index]
+        target = max(profile.lower[index], min(profile.upper[index], current + args.degrees))
+        logger.info("Jogging %s from %.1f to %.1f", args.servo, current, target)
+        controller.set_angle(args.servo, target)
+    finally:
+        controller.close()
+
+
+def _plan(profile, start, goal, args):
+    from planner import Environment, PlanningError, RoadmapPlanner, path_to_program
+
+    planner = RoadmapPlanner(profile, Environment.load(args.environment)).load_or_build()
+    try:
+        path = planner.plan(start, goal)
+    except PlanningError as e:
+        raise SystemExit(f"Planning failed: {e}")
+    logger.info("Planned %d segments around obstacles", len(path) - 1)
+    return path_to_program(path, args.max_speed, name='goto')
+
+
+def _servo_angle(text):
+    """argparse type for 'servo=angle' arguments."""
+    from config import SERVO_NAMES
+
+    name, _, value = text.partition('=')
+    if name not in SERVO_NAMES:
+        raise argparse.ArgumentTypeError(
+            f"unknown servo in '{text}', expected one of {', '.join(SERVO_NAMES)}")
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected servo=angle in degrees, got '{text}'")
+
+
+def _script_count(text):
+    """argparse type for a repeat count the Maestro can take (14 bits)."""
+    try:
+        count = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a whole number, got '{text}'")
+    if not 1 <= count <= 16383:
+        raise argparse.ArgumentTypeError(f"count must be between 1 and 16383, got {count}")
+    return count
+
+
+def cmd_goto(args):
+    from program import MotionProgram
+
+    profile = _load_profile(args)
+    for name, angle in args.angles:
+        index = profile.names.index(name)
+        if not profile.lower[index] <= angle <= profile.upper[index]:
+            raise SystemExit(f"{name}={angle:g} is outside its limits "
+                             f"{profile.lower[index]:g}..{profile.upper[index]:g}")
+    controller = _connect(args, profile)
+    try:
+        start = _current_pose(controller, profile)
+        pose = list(start)
+        for name, angle in args.angles:
+            pose[profile.names.index(name)] = angle
+        if args.plan:
+            program = _plan(profile, start, pose, args)
+        else:
+            program = MotionProgram('goto')
+            program.add_waypoint(pose, args.duration)
+        _play(controller, program, profile, args, start=start)
+    finally:
+        controller.close()
+
+
+def cmd_run_program(args):
+    from program import MotionProgram
+
+    profile = _load_profile(args)
+    program = MotionProgram.load(args.path)
+    if args.loop:
+        program.loop = True
+    controller = _connect(args, profile)
+    try:
+        _play(controller, program, profile, args, start=_current_pose(controller, profile))
+    finally:
+        controller.close()
+
+
+def cmd_script(args):
+    from maestro_script import (SCRIPT_CAPACITY, SUB_COUNT, SUB_LOOP, SUB_ONCE,
+                                ScriptCompiler, ScriptError, upload_script)
+
+    try:
+        if args.action == 'compile':
+            from program import MotionProgram
+
+            profile = _load_profile(args)
+            program = MotionProgram.load(args.path)
+            if args.loop:
+                program.loop = True
+            compiler = ScriptCompiler(profile, substeps=args.substeps)
+            source = compiler.compile_to_fit(program, SCRIPT_CAPACITY[args.channels])
+            output = args.output or args.path.rsplit('.', 1)[0] + '.txt'
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(source)
+            logger.info("Wrote %s", output)
+            if args.upload:
+                upload_script(output)
+        elif args.action == 'upload':
+            upload_script(args.path)
+        else:
+            profile = _load_profile(args)
+            controller = _connect(args, profile)
+            try:
+                if args.action == 'stop':
+                    controller.stop_script()
+                elif args.count is not None:
+                    controller.restart_script(SUB_COUNT, args.count)
+                else:
+                    controller.restart_script(SUB_LOOP if args.loop else SUB_ONCE)
+            finally:
+                controller.close()
+    except ScriptError as e:
+        raise SystemExit(str(e))
+
+
+def cmd_probe_cameras(args):
+    from camera_probe import probe_cameras
+
+    cameras = probe_cameras(args.max_index)
+    print("Detected Cameras:", cameras)
+
+
+def run_benchmark(name):
+    """Run one of BENCHMARKS and return its result as a line of text."""
+    if name == 'conditioning':
+        from input_conditioning import benchmark_conditioning
+        return f"Input conditioning: {benchmark_conditioning():.1f} us per tick"
+    if name == 'watchdog':
+        from watchdog import simulate_stall
+        reactions = simulate_stall()
+        return (f"Watchdog: mean {sum(reactions) / len(reactions) * 1000:.1f} ms, "
+                f"max {max(reactions) * 1000:.1f} ms reaction over {len(reactions)} stalls")
+    if name == 'program':
+        from program import benchmark_program
+        samples, compile_ms, step_us = benchmark_program()
+        return (f"Program: compiled {samples} samples in {compile_ms:.1f} ms, "
+                f"{step_us:.1f} us per playback step")
+    if name == 'planner':
+        from planner import benchmark_planner
+        build_time, query_ms, solved = benchmark_planner()
+        return (f"Planner: roadmap ready in {build_time:.2f} s, "
+                f"{query_ms:.2f} ms per query, {solved:.0%} solved")
+    if name == 'thermal':
+        from thermal import benchmark_thermal
+        return f"Thermal model: {benchmark_thermal():.1f} us per update"
+    if name == 'pipeline':
+        from frame_pipeline import benchmark_pipeline
+        display_fps, crop, slow = benchmark_pipeline()
+        return (f"Frame pipeline: display {display_fps:.1f} fps, crop {crop['latency_ms']:.2f} ms; "
+                f"100 ms side stage {slow['processed']} processed, {slow['skipped']} skipped")
+    if name == 'undistort':
+        from undistort import benchmark_undistort
+        stream_fps, remap_ms, plain_ms = benchmark_undistort()
+        return (f"Undistort: {', '.join(f'{fps:.1f}' for fps in stream_fps)} fps on "
+                f"{len(stream_fps)} streams, {remap_ms:.2f} ms per remap "
+                f"(cv2.undistort {plain_ms:.2f} ms)")
+    raise ValueError(f"Unknown benchmark '{name}'")
+
+
+def cmd_bench(args):
+    for name in BENCHMARKS if args.name == 'all' else (args.name,):
+        print(run_benchmark(name))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='robot_arm_control',
+                                     description="Headless control of the EEZYbotARM MK2")
+    parser.add_argument('--config', help="configuration file (default: config.json)")
+    parser.add_argument('--profile', help="arm profile (default: the file's default_profile)")
+    parser.add_argument('--port', help="override the profile's Maestro serial port")
+    parser.add_argument('--log-level', default='INFO', help="logging level (default: INFO)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    jog = subparsers.add_parser('jog', help="move one servo by a number of degrees")
+    jog.add_argument('servo')
+    jog.add_argument('degrees', type=float)
+    jog.set_defaults(func=cmd_jog)
+
+    goto = subparsers.add_parser('goto', help="move smoothly to a pose, e.g. base=90 elbow=100")
+    goto.add_argument('angles', nargs='+', type=_servo_angle, metavar='servo=angle')
+    goto.add_argument('--duration', type=float, default=2.0, help="seconds (default: 2)")
+    goto.add_argument('--rate', type=float, default=50.0, help="samples per second (default: 50)")
+    goto.add_argument('--plan', action='store_true',
+                      help="plan a collision-free path instead of moving in a straight line")
+    goto.add_argument('--environment', default='environment.json',
+                      help="obstacle file for --plan (default: environment.json)")
+    goto.add_argument('--max-speed', type=float, default=60.0,
+                      help="peak joint speed for --plan in degrees per second (default: 60)")
+    goto.set_defaults(func=cmd_goto)
+
+    run_program = subparsers.add_parser('run-program', help="play a saved .rap program")
+    run_program.add_argument('path')
+    run_program.add_argument('--loop', action='store_true', help="repeat until interrupted")
+    run_program.add_argument('--rate', type=float, default=50.0, help="samples per second (default: 50)")
+    run_program.set_defaults(func=cmd_run_program)
+
+    script = subparsers.add_parser('script', help="run programs on the Maestro's own script engine")
+    actions = script.add_subparsers(dest='action', required=True)
+    compile_script = actions.add_parser('compile', help="compile a .rap program to a Maestro script")
+    compile_script.add_argument('path')
+    compile_script.add_argument('-o', '--output', help="script file (default: next to the program)")
+    compile_script.add_argument('--loop', action='store_true', help="close the cycle like a looping program")
+    compile_script.add_argument('--substeps', type=int, default=4,
+                                help="speed-limited pieces per segment (default: 4)")
+    compile_script.add_argument('--channels', type=int, default=6, choices=(6, 12, 18, 24),
+                                help="Maestro model, sets the script memory limit (default: 6)")
+    compile_script.add_argument('--upload', action='store_true', help="upload with UscCmd afterwards")
+    upload = actions.add_parser('upload', help="upload a script file with UscCmd")
+    upload.add_argument('path')
+    run_script = actions.add_parser('run', help="start the uploaded program")
+    run_script.add_argument('--loop', action='store_true', help="repeat until stopped")
+    run_script.add_argument('--count', type=_script_count, help="repeat this many times (1-16383)")
+    actions.add_parser('stop', help="stop the on-board script")
+    script.set_defaults(func=cmd_script)
+
+    probe = subparsers.add_parser('probe-cameras', help="list available camera indices")
+    probe.add_argument('--max-index', type=int, default=10)
+    probe.set_defaults(func=cmd_probe_cameras)
+
+    bench = subparsers.add_parser('bench', help="run the built-in benchmarks")
+    bench.add_argument('name', nargs='?', default='all', choices=('all',) + BENCHMARKS)
+    bench.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(),
+                        format='%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
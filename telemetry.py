@@ -0,0 +1,258 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+
+class _Level:
+    """Per-block time, min and max of one level of a RingBuffer's pyramid."""
+    __slots__ = ('block', 'times', 'mins', 'maxs')
+
+    def __init__(self, block, size, dtype):
+        self.block = block
+        self.times = np.zeros(size, dtype=np.float64)
+        self.mins = np.zeros(size, dtype=dtype)
+        self.maxs = np.zeros(size, dtype=dtype)
+
+
+def _ring_slice(array, first, stop):
+    """Copy of ring entries `first`..`stop` (absolute indices, stop exclusive)."""
+    size = len(array)
+    start = first % size
+    end = start + (stop - first)
+    if end <= size:
+        return array[start:end].copy()
+    return np.concatenate((array[start:], array[:end - size]))
+
+
+class RingBuffer:
+    """
+    Preallocated time/value ring buffer for one telemetry signal.
+
+    `count` is the total number of samples ever written; it keeps growing
+    after the buffer wraps and is used to find samples not yet flushed.
+    Every LEVEL_FACTOR samples the finished block's min and max are added
+    to a min/max pyramid (one level per further factor), so decimated()
+    can draw long windows from a fixed number of summaries.
+    """
+    LEVEL_FACTOR = 64
+
+    def __init__(self, capacity, dtype=np.float32, levels=2):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros(capacity, dtype=dtype)
+        self.count = 0
+        self.levels = []
+        block = 1
+        for _ in range(levels):
+            block *= self.LEVEL_FACTOR
+            if capacity % block:
+                break
+            self.levels.append(_Level(block, capacity // block, dtype))
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, timestamp, value):
+        index = self.count % self.capacity
+        self.times[index] = timestamp
+        self.values[index] = value
+        self.count += 1
+        if self.levels and self.count % self.LEVEL_FACTOR == 0:
+            self._summarize()
+
+    def _summarize(self):
+        times, mins, maxs = self.times, self.values, self.values
+        for level in self.levels:
+            if self.count % level.block:
+                break
+            block = self.count // level.block - 1
+            start = block * self.LEVEL_FACTOR % len(times)
+            stop = start + self.LEVEL_FACTOR
+            index = block % len(level.times)
+            level.times[index] = times[start]
+            level.mins[index] = mins[start:stop].min()
+            level.maxs[index] = maxs[start:stop].max()
+            times, mins, maxs = level.times, level.mins, level.maxs
+
+    def since(self, count):
+        """Return (times, values, first_count) for samples written after `count`."""
+        first = max(count, self.count - self.capacity)
+        if self.count - first <= 0:
+            return self.times[:0].copy(), self.values[:0].copy(), self.count
+        return (_ring_slice(self.times, first, self.count),
+                _ring_slice(self.values, first, self.count), first)
+
+    def first_within(self, seconds=None):
+        """Count of the first retained sample in the last `seconds` (all for None)."""
+        first = max(0, self.count - self.capacity)
+        if seconds is None or self.count == first:
+            return first
+        cutoff = self.times[(self.count - 1) % self.capacity] - seconds
+        # Retained samples are two sorted runs: the older one up to the end of
+        # the array, then the newer one from its start
+        start = first % self.capacity
+        older = min(self.capacity - start, self.count - first)
+        index = int(np.searchsorted(self.times[start:start + older], cutoff))
+        if index < older:
+            return first + index
+        newer = self.count - first - older
+        return first + older + int(np.searchsorted(self.times[:newer], cutoff))
+
+    def latest(self, seconds=None):
+        """Return chronologically ordered (times, values), optionally the last `seconds`."""
+        times, values, _ = self.since(self.first_within(seconds))
+        return times, values
+
+    def decimated(self, seconds, bins):
+        """
+        The last `seconds` (all retained samples for None) reduced to at most
+        2 * bins min/max points, as minmax_decimate() would. Windows long
+        enough are read from the coarsest pyramid level that still has
+        2 * bins blocks, so the cost depends on bins and not on the window.
+        """
+        first = self.first_within(seconds)
+        level = None
+        for candidate in self.levels:
+            if (self.count - first) // candidate.block >= 2 * bins:
+                level = candidate
+        if level is None:
+            times, values, _ = self.since(first)
+            return minmax_decimate(times, values, bins)
+
+        # Whole blocks from the pyramid, partial blocks at either end from the samples
+        block = level.block
+        head = -(-first // block)
+        tail = self.count // block
+        head_times = _ring_slice(self.times, first, head * block)
+        head_values = _ring_slice(self.values, first, head * block)
+        tail_times = _ring_slice(self.times, tail * block, self.count)
+        tail_values = _ring_slice(self.values, tail * block, self.count)
+        times = np.concatenate((head_times, _ring_slice(level.times, head, tail), tail_times))
+        mins = np.concatenate((head_values, _ring_slice(level.mins, head, tail), tail_values))
+        maxs = np.concatenate((head_values, _ring_slice(level.maxs, head, tail), tail_values))
+        return _minmax_bins(times, mins, maxs, bins)
+
+
+def _minmax_bins(times, mins, maxs, bins):
+    edges = np.linspace(0, len(times), bins + 1).astype(np.intp)[:-1]
+    out_times = np.repeat(times[edges], 2)
+    out_values = np.empty(2 * bins, dtype=mins.dtype)
+    out_values[0::2] = np.minimum.reduceat(mins, edges)
+    out_values[1::2] = np.maximum.reduceat(maxs, edges)
+    return out_times, out_values
+
+
+def minmax_decimate(times, values, bins):
+    """
+    Reduce a series to at most 2 * bins points, keeping each bin's min and max.
+
+    Spikes survive decimation, so the plot looks like the full-rate data
+    while the number of drawn points stays fixed.
+    """
+    if len(values) <= 2 * bins:
+        return times, values
+    return _minmax_bins(times, values, values, bins)
+
+
+class TelemetryRecorder:
+    """
+    In-process store of named time series.
+
+    Each signal gets its own RingBuffer. When `flush_dir` is set,
+    maybe_flush() periodically writes the samples recorded since the last
+    flush to a compressed .npz chunk (one time and one value column per
+    signal) from a background thread.
+    """
+
+    def __init__(self, capacity=2 ** 18, flush_dir=None, flush_interval=60.0):
+        self.capacity = capacity
+        self.signals = {}
+        self.flush_dir = flush_dir
+        self.flush_interval = flush_interval
+        self._flushed = {}
+        self._last_flush = time.monotonic()
+        self._chunk = 0
+        self._session = time.strftime('%Y%m%d_%H%M%S')
+        self._writer = None
+
+    def add_signal(self, name, dtype=np.float32):
+        """Create a signal buffer, or return the existing one."""
+        if name not in self.signals:
+            self.signals[name] = RingBuffer(self.capacity, dtype)
+            self._flushed[name] = 0
+        return self.signals[name]
+
+    def record(self, name, value, timestamp=None):
+        """Append one sample, creating the signal on first use."""
+        buffer = self.signals.get(name)
+        if buffer is None:
+            buffer = self.add_signal(name)
+        buffer.append(time.monotonic() if timestamp is None else timestamp, value)
+
+    def get(self, name, seconds=None):
+        """Return (times, values) for a signal, optionally only the last `seconds`."""
+        return self.signals[name].latest(seconds)
+
+    def decimated(self, name, seconds, bins):
+        """Return a signal's last `seconds` (None for all) min/max-decimated to `bins`."""
+        return self.signals[name].decimated(seconds, bins)
+
+    def names(self):
+        return list(self.signals.keys())
+
+    def maybe_flush(self, now=None):
+        """Flush if flush_interval has passed since the last flush."""
+        now = time.monotonic() if now is None else now
+        if self.flush_dir and now - self._last_flush >= self.flush_interval:
+            self.flush()
+            self._last_flush = now
+
+    def flush(self, wait=False):
+        """Write unflushed samples of every signal to the next chunk file."""
+        if not self.flush_dir:
+            return None
+        columns = {}
+        for name, buffer in self.signals.items():
+            times, values, _ = buffer.since(self._flushed[name])
+            self._flushed[name] = buffer.count
+            if len(times):
+                columns[f"{name}/time"] = times
+                columns[f"{name}/value"] = values
+        if not columns:
+            return None
+
+        os.makedirs(self.flush_dir, exist_ok=True)
+        path = os.path.join(self.flush_dir, f"telemetry_{self._session}_{self._chunk:05d}.npz")
+        self._chunk += 1
+
+        # Only one writer at a time so chunks land on disk in order
+        if self._writer is not None:
+            self._writer.join()
+        self._writer = threading.Thread(target=np.savez_compressed, args=(path,),
+                                        kwargs=columns, daemon=True)
+        self._writer.start()
+        if wait:
+            self._writer.join()
+        return path
+
+    def close(self):
+        """Flush remaining samples and wait for the writer to finish."""
+        self.flush(wait=True)
+        if self._writer is not None:
+            self._writer.join()
+
+
+def load_chunks(paths):
+    """Concatenate telemetry chunk files into {signal: (times, values)}."""
+    data = {}
+    for path in sorted(paths):
+        with np.load(path) as chunk:
+            for key in chunk.files:
+                name, column = key.rsplit('/', 1)
+                data.setdefault(name, {'time': [], 'value': []})[column].append(chunk[key])
+    return {
+        name: (np.concatenate(columns['time']), np.concatenate(columns['value']))
+        for name, columns in data.items()
+    }
@@ -0,0 +1,85 @@
+import time
+
+import pyqtgraph as pg
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QLabel
+from PyQt5.QtCore import QTimer
+
+
+WINDOWS = [("1 min", 60), ("10 min", 600), ("1 hour", 3600), ("All", None)]
+COLORS = ['r', 'g', 'b', 'm', 'c', 'y', 'k']
+
+
+class TelemetryPanel(QWidget):
+    """
+    Live plot of TelemetryRecorder signals.
+
+    Every refresh min/max-decimates each signal to roughly one point pair
+    per horizontal pixel, reading only the selected window and, for long
+    windows, the recorder's min/max pyramid, so neither reading nor drawing
+    cost grows with history length.
+    With a ViewManager, refreshes are skipped while the panel is hidden or
+    minimized and slowed to once a second while another window has focus.
+    """
+
+    def __init__(self, recorder, signals, title="Telemetry", refresh_rate=200, view_manager=None):
+        super().__init__()
+        self.setWindowTitle(title)
+        self.recorder = recorder
+        self.signals = signals
+        self.view_manager = view_manager
+
+        layout = QVBoxLayout(self)
+        window_layout = QHBoxLayout()
+        window_layout.addWidget(QLabel("Window:"))
+        self.window_combo = QComboBox()
+        self.window_combo.addItems([name for name, _ in WINDOWS])
+        window_layout.addWidget(self.window_combo)
+        window_layout.addStretch(1)
+        layout.addLayout(window_layout)
+
+        self.plot = pg.PlotWidget()
+        self.plot.setBackground('w')
+        self.plot.addLegend()
+        self.plot.setLabel('bottom', 'Time', units='s')
+        layout.addWidget(self.plot, stretch=1)
+
+        self.curves = {}
+        for i, name in enumerate(signals):
+            self.curves[name] = self.plot.plot([], [], name=name,
+                                               pen=pg.mkPen(COLORS[i % len(COLORS)]))
+
+        if view_manager is not None:
+            view_manager.register(self, unfocused_interval=1.0)
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(refresh_rate)
+
+    def refresh(self):
+        """Redraw all curves from the recorder."""
+        if self.view_manager is not None:
+            if not self.view_manager.should_update(self):
+                return
+        elif not self.isVisible():
+            return
+        start = time.monotonic()
+        seconds = WINDOWS[self.window_combo.currentIndex()][1]
+        bins = max(1, self.plot.width())
+        for name, curve in self.curves.items():
+            if name not in self.recorder.signals:
+                continue
+            curve.setData(*self.recorder.decimated(name, seconds, bins))
+        if self.view_manager is not None:
+            self.view_manager.record_render(time.monotonic() - start)
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        if self.view_manager is not None:
+            self.view_manager.unregister(self)
+        event.accept()
+
+    def showEvent(self, event):
+        if self.view_manager is not None and self not in self.view_manager.views:
+            self.view_manager.register(self, unfocused_interval=1.0)
+        self.timer.start()
+        super().showEvent(event)
@@ -0,0 +1,153 @@
+import logging
+import math
+import time
+
+import numpy as np
+
+from kinematics import ArmGeometry
+
+logger = logging.getLogger(__name__)
+
+GRAVITY = 9.81e-3  # N per gram
+
+
+class LoadModel:
+    """
+    Static holding torque on each servo, in N·mm, from the arm's pose.
+
+    Link masses (grams) sit at the link midpoints, the gripper and payload
+    at the gripper's midpoint. The shoulder holds everything beyond it; the
+    elbow servo drives the forearm through the parallel linkage, so it holds
+    the forearm and gripper about the elbow. The base only carries a small
+    constant friction load. The gripper presses on a held object whenever
+    it is commanded closer than `grip_contact` (smaller angles close),
+    reaching `grip_torque` at `grip_span` degrees past contact.
+    """
+
+    def __init__(self, geometry=None, upper_arm_mass=60.0, forearm_mass=50.0,
+                 gripper_mass=45.0, payload=20.0, base_torque=50.0,
+                 stall_torque=(920.0, 920.0, 920.0, 180.0),
+                 grip_contact=110.0, grip_span=15.0, grip_torque=150.0):
+        self.geometry = geometry or ArmGeometry()
+        self.upper_arm_mass = upper_arm_mass
+        self.forearm_mass = forearm_mass
+        self.gripper_mass = gripper_mass + payload
+        self.base_torque = base_torque
+        self.stall_torque = np.asarray(stall_torque, dtype=float)
+        self.grip_contact = grip_contact
+        self.grip_span = grip_span
+        self.grip_torque = grip_torque
+
+    def torques(self, q):
+        """Holding torque per joint for poses q of shape (..., 4)."""
+        q = np.asarray(q, dtype=float)
+        geometry = self.geometry
+        # Horizontal lever arms; see kinematics.joint_frames for the angle conventions
+        upper_reach = geometry.upper_arm * np.cos(np.radians(180.0 - q[..., 1]))
+        forearm_reach = geometry.forearm * np.cos(np.radians(90.0 - q[..., 2]))
+        gripper_reach = forearm_reach + geometry.gripper / 2
+
+        elbow_torque = GRAVITY * np.abs(self.forearm_mass * forearm_reach / 2 +
+                                        self.gripper_mass * gripper_reach)
+        shoulder_torque = GRAVITY * np.abs(self.upper_arm_mass * upper_reach / 2 +
+                                           self.forearm_mass * (upper_reach + forearm_reach / 2) +
+                                           self.gripper_mass * (upper_reach + gripper_reach))
+        grip = np.clip((self.grip_contact - q[..., 3]) / self.grip_span, 0.0, 1.0) * self.grip_torque
+        return np.stack((np.full_like(grip, self.base_torque), shoulder_torque, elbow_torque, grip),
+                        axis=-1)
+
+    def loads(self, q):
+        """Holding torque as a fraction of each servo's stall torque."""
+        return self.torques(q) / self.stall_torque
+
+    def rest_pose(self, lower, upper, base=90.0, gripper=None, steps=37):
+        """Lowest-load shoulder/elbow pose within the joint limits, found on a grid."""
+        shoulder, elbow = np.meshgrid(np.linspace(lower[1], upper[1], steps),
+                                      np.linspace(lower[2], upper[2], steps))
+        poses = np.zeros((shoulder.size, 4))
+        poses[:, 0] = base
+        poses[:, 1] = shoulder.ravel()
+        poses[:, 2] = elbow.ravel()
+        poses[:, 3] = upper[3] if gripper is None else gripper
+        best = np.argmin((self.loads(poses)[:, 1:3] ** 2).sum(axis=1))
+        return poses[best]
+
+
+class ThermalModel:
+    """
+    First-order thermal budget per servo, updated once per control tick.
+
+    Heating follows the square of the load (motor current is roughly
+    proportional to torque): at continuous stall a servo settles
+    `stall_rise` degrees above ambient with time constant `time_constant`.
+    Each update is an exact exponential step of a fixed number of NumPy
+    operations, so the cost does not depend on how long the arm has run.
+    `heat` is the rise as a fraction of `max_rise`; a joint is over budget
+    from 1.0 until it cools below `resume_fraction`.
+    """
+
+    def __init__(self, load_model=None, time_constant=120.0, stall_rise=80.0,
+                 max_rise=40.0, resume_fraction=0.8):
+        self.load_model = load_model or LoadModel()
+        self.time_constant = time_constant
+        self.stall_rise = stall_rise
+        self.max_rise = max_rise
+        self.resume_fraction = resume_fraction
+        self.rise = np.zeros(4)
+        self.load = np.zeros(4)
+        self.over_budget = np.zeros(4, dtype=bool)
+        self._last_time = None
+
+    @classmethod
+    def from_config(cls, config, geometry=None):
+        """Build a model from a ThermalConfig."""
+        load_model = LoadModel(geometry, payload=config.payload, grip_contact=config.grip_contact)
+        return cls(load_model, config.time_constant, config.stall_rise,
+                   config.max_rise, config.resume_fraction)
+
+    @property
+    def heat(self):
+        return self.rise / self.max_rise
+
+    def reset(self):
+        self.rise[:] = 0.0
+        self.over_budget[:] = False
+        self._last_time = None
+
+    def update(self, angles, now=None, powered=True):
+        """
+        Advance the model to `now` holding `angles` (one per servo).
+        With `powered` False the servos are not driven and only cool down.
+        Returns the boolean over-budget mask.
+        """
+        now = time.monotonic() if now is None else now
+        dt = 0.0 if self._last_time is None else now - self._last_time
+        self._last_time = now
+
+        self.load = self.load_model.loads(angles) if powered else np.zeros(4)
+        target = self.stall_rise * self.load * self.load
+        decay = math.exp(-dt / self.time_constant)
+        self.rise *= decay
+        self.rise += (1.0 - decay) * target
+
+        heat = self.heat
+        self.over_budget |= heat >= 1.0
+        self.over_budget &= heat >= self.resume_fraction
+        return self.over_budget
+
+
+def benchmark_thermal(iterations=20000):
+    """Time one thermal update. Returns microseconds."""
+    model = ThermalModel()
+    rng = np.random.default_rng(0)
+    poses = rng.uniform((0, 90, 90, 95), (180, 160, 120, 180), size=(256, 4))
+    start = time.perf_counter()
+    for i in range(iterations):
+        model.update(poses[i & 255], now=i * 0.02)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+if __name__ == "__main__":
+    # Same as `python -m robot_arm_control bench thermal`
+    from robot_arm_control import main
+    raise SystemExit(main(['bench', 'thermal']))
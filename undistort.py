@@ -0,0 +1,280 @@
+"""
+Camera intrinsics calibration and fast undistortion.
+
+    python undistort.py calibrate 0 shots/left_*.png --board 9x6 --square 25
+    python undistort.py bench
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from frame_pipeline import Stage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CALIBRATION_DIR = 'calibration'
+
+
+class Intrinsics:
+    """Camera matrix and distortion coefficients at the calibrated resolution."""
+
+    def __init__(self, width, height, camera_matrix, dist_coeffs, rms=None):
+        self.width = int(width)
+        self.height = int(height)
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64).reshape(3, 3)
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64).ravel()
+        self.rms = rms
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['width'], data['height'], data['camera_matrix'],
+                   data['dist_coeffs'], data.get('rms'))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'width': self.width, 'height': self.height,
+                       'camera_matrix': self.camera_matrix.tolist(),
+                       'dist_coeffs': self.dist_coeffs.tolist(),
+                       'rms': self.rms}, f, indent=2)
+
+    def key(self):
+        return hashlib.sha1(self.camera_matrix.tobytes() + self.dist_coeffs.tobytes() +
+                            repr((self.width, self.height)).encode()).hexdigest()[:12]
+
+    def scaled(self, width, height):
+        """Camera matrix for another capture resolution of the same sensor."""
+        matrix = self.camera_matrix.copy()
+        matrix[0] *= width / self.width
+        matrix[1] *= height / self.height
+        return matrix
+
+
+def intrinsics_path(camera_id, calibration_dir=DEFAULT_CALIBRATION_DIR):
+    return os.path.join(calibration_dir, f"camera{camera_id}.json")
+
+
+def find_corners(image, board):
+    """Sub-pixel chessboard corners of an image, or None if the board is not found."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    found, corners = cv2.findChessboardCorners(
+        gray, board, cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE)
+    if not found:
+        return None
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+    return cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
+
+
+def calibrate(images, board=(9, 6), square=25.0):
+    """
+    Calibrate from chessboard views. `board` is the count of inner corners
+    (columns, rows) and `square` the square size in mm. Returns Intrinsics.
+    """
+    pattern = np.zeros((board[0] * board[1], 3), np.float32)
+    pattern[:, :2] = np.mgrid[0:board[0], 0:board[1]].T.reshape(-1, 2) * square
+
+    object_points, image_points, size = [], [], None
+    for image in images:
+        corners = find_corners(image, board)
+        if corners is None:
+            continue
+        size = (image.shape[1], image.shape[0])
+        object_points.append(pattern)
+        image_points.append(corners)
+    if len(image_points) < 3:
+        raise ValueError(f"Chessboard found in {len(image_points)} views, need at least 3")
+
+    rms, matrix, dist, _, _ = cv2.calibrateCamera(object_points, image_points, size, None, None)
+    logger.info("Calibrated from %d views, RMS reprojection error %.3f px", len(image_points), rms)
+    return Intrinsics(size[0], size[1], matrix, dist, float(rms))
+
+
+def undistort_maps(intrinsics, width, height, alpha=0.0, cache_dir=DEFAULT_CALIBRATION_DIR):
+    """
+    Fixed-point remap tables for one capture resolution.
+
+    initUndistortRectifyMap runs once per intrinsics, resolution and alpha;
+    the CV_16SC2 map (int16 pixel coordinates) and its uint16 interpolation
+    table are saved as .npy files and memory-mapped on later runs.
+    """
+    base = os.path.join(cache_dir, f"undistort_{intrinsics.key()}_{width}x{height}_{alpha:g}")
+    paths = (base + '.map1.npy', base + '.map2.npy')
+    if all(os.path.exists(path) for path in paths):
+        return tuple(np.load(path, mmap_mode='r') for path in paths)
+
+    matrix = intrinsics.scaled(width, height)
+    new_matrix, _ = cv2.getOptimalNewCameraMatrix(matrix, intrinsics.dist_coeffs,
+                                                  (width, height), alpha)
+    map1, map2 = cv2.initUndistortRectifyMap(matrix, intrinsics.dist_coeffs, None, new_matrix,
+                                             (width, height), cv2.CV_16SC2)
+    os.makedirs(cache_dir, exist_ok=True)
+    for path, table in zip(paths, (map1, map2)):
+        np.save(path, table)
+    logger.info("Saved undistortion maps for %dx%d to %s", width, height, base)
+    return tuple(np.load(path, mmap_mode='r') for path in paths)
+
+
+class Undistorter(Stage):
+    """
+    Remap frames with precomputed fixed-point undistortion tables.
+
+    Call it directly as a capture transform (CameraManager.set_transform),
+    so remapping happens on the capture worker, or register it as a
+    pipeline stage. Tables are loaded per frame size on first use.
+    """
+    name = 'undistort'
+
+    def __init__(self, intrinsics, alpha=0.0, cache_dir=DEFAULT_CALIBRATION_DIR):
+        self.intrinsics = intrinsics
+        self.alpha = alpha
+        self.cache_dir = cache_dir
+        self.maps = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_camera(cls, camera_id, calibration_dir=DEFAULT_CALIBRATION_DIR, alpha=0.0):
+        """Undistorter for a calibrated camera, or None if it has no calibration."""
+        path = intrinsics_path(camera_id, calibration_dir)
+        if not os.path.exists(path):
+            return None
+        return cls(Intrinsics.load(path), alpha, calibration_dir)
+
+    def _maps_for(self, width, height):
+        maps = self.maps.get((width, height))
+        if maps is None:
+            with self._lock:
+                maps = self.maps.get((width, height))
+                if maps is None:
+                    maps = undistort_maps(self.intrinsics, width, height, self.alpha, self.cache_dir)
+                    self.maps[(width, height)] = maps
+        return maps
+
+    def __call__(self, frame):
+        map1, map2 = self._maps_for(frame.shape[1], frame.shape[0])
+        return cv2.remap(frame, map1, map2, cv2.INTER_LINEAR)
+
+    def process(self, frame, meta):
+        return self(frame)
+
+    def close(self):
+        """Drop the cached maps, unmapping any loaded from .npy files."""
+        with self._lock:
+            self.maps.clear()
+
+
+def benchmark_undistort(streams=2, frames=150, fps=30.0, cache_dir=None):
+    """
+    Undistort `streams` synthetic 640x480 streams paced at `fps`, each on its
+    own thread as the capture workers would. Returns (per-stream fps, mean
+    remap ms, mean cv2.undistort ms for comparison).
+    """
+    import tempfile
+
+    width, height = 640, 480
+    intrinsics = Intrinsics(width, height, [[600, 0, 320], [0, 600, 240], [0, 0, 1]],
+                            [-0.3, 0.1, 0.001, 0.001, 0.0])
+    with tempfile.TemporaryDirectory() as temp_dir:
+        undistorter = Undistorter(intrinsics, cache_dir=cache_dir or temp_dir)
+        undistorter._maps_for(width, height)
+        # Second instance memory-maps the cached tables, as at startup
+        undistorter = Undistorter(intrinsics, cache_dir=cache_dir or temp_dir)
+        rng = np.random.default_rng(0)
+        frame = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+
+        results = [None] * streams
+
+        def run(index):
+            remap_time = 0.0
+            start = time.perf_counter()
+            for i in range(frames):
+                t = time.perf_counter()
+                undistorter(frame)
+                remap_time += time.perf_counter() - t
+                remaining = start + (i + 1) / fps - time.perf_counter()
+                if remaining > 0:
+                    time.sleep(remaining)
+            results[index] = (frames / (time.perf_counter() - start), remap_time / frames)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(streams)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Unmap the cached tables first: Windows cannot delete a mapped file
+        undistorter.close()
+
+    start = time.perf_counter()
+    for _ in range(20):
+        cv2.undistort(frame, intrinsics.camera_matrix, intrinsics.dist_coeffs)
+    plain_ms = (time.perf_counter() - start) / 20 * 1000
+    stream_fps = [result[0] for result in results]
+    remap_ms = sum(result[1] for result in results) / streams * 1000
+    return stream_fps, remap_ms, plain_ms
+
+
+def _capture_views(camera_id, count, board, interval=1.0):
+    """Grab frames from a live camera until `count` chessboard views are found."""
+    cap = cv2.VideoCapture(camera_id, cv2.CAP_DSHOW)
+    if not cap.isOpened():
+        raise SystemExit(f"Failed to open camera {camera_id}")
+    views = []
+    last = 0.0
+    try:
+        while len(views) < count:
+            ok, frame = cap.read()
+            if not ok:
+                raise SystemExit(f"Error reading from camera {camera_id}")
+            now = time.monotonic()
+            if now - last >= interval and find_corners(frame, board) is not None:
+                views.append(frame)
+                last = now
+                logger.info("Captured view %d of %d", len(views), count)
+    finally:
+        cap.release()
+    return views
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Camera calibration and undistortion")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    cal = subparsers.add_parser('calibrate', help="calibrate a camera from chessboard views")
+    cal.add_argument('camera', type=int, help="camera index the calibration is stored for")
+    cal.add_argument('images', nargs='*', help="image files or globs; omit to capture live")
+    cal.add_argument('--board', default='9x6', help="inner corners, columns x rows (default: 9x6)")
+    cal.add_argument('--square', type=float, default=25.0, help="square size in mm (default: 25)")
+    cal.add_argument('--views', type=int, default=20, help="live views to capture (default: 20)")
+    cal.add_argument('--calibration-dir', default=DEFAULT_CALIBRATION_DIR)
+    subparsers.add_parser('bench', help="time undistortion of two 640x480 streams")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)-7s %(name)s: %(message)s')
+
+    if args.command == 'bench':
+        # Same as `python -m robot_arm_control bench undistort`
+        from robot_arm_control import main as run_cli
+        return run_cli(['bench', 'undistort'])
+
+    board = tuple(int(n) for n in args.board.lower().split('x'))
+    if args.images:
+        paths = sorted(path for pattern in args.images for path in glob.glob(pattern))
+        images = [image for image in (cv2.imread(path) for path in paths) if image is not None]
+    else:
+        images = _capture_views(args.camera, args.views, board)
+    intrinsics = calibrate(images, board, args.square)
+    path = intrinsics_path(args.camera, args.calibration_dir)
+    intrinsics.save(path)
+    print(f"Saved {path} (RMS {intrinsics.rms:.3f} px)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
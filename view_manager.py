@@ -0,0 +1,137 @@
+import time
+
+from PyQt5.QtCore import QEvent, QObject, Qt
+
+_STATE_EVENTS = {QEvent.Show, QEvent.Hide, QEvent.Resize, QEvent.WindowStateChange,
+                 QEvent.WindowActivate, QEvent.WindowDeactivate, QEvent.ActivationChange}
+
+
+class _View:
+    __slots__ = ('widget', 'min_interval', 'unfocused_interval', 'visible', 'focused',
+                 'width', 'height', 'last_update', 'updates', 'skipped')
+
+    def __init__(self, widget, min_interval, unfocused_interval):
+        self.widget = widget
+        self.min_interval = min_interval
+        self.unfocused_interval = unfocused_interval
+        self.visible = True
+        self.focused = True
+        self.width = widget.width()
+        self.height = widget.height()
+        self.last_update = 0.0
+        self.updates = 0
+        self.skipped = 0
+
+
+class ViewManager(QObject):
+    """
+    Decide which display widgets are worth redrawing, and how.
+
+    Visibility, size and focus of each registered widget are cached from
+    Qt events, so should_update() costs a dict lookup and a clock read.
+    Views that are hidden, zero-sized or in a minimized window are skipped
+    before any conversion or scaling work. Views whose window is not the
+    active one are updated at most every `unfocused_interval` seconds.
+    Render times reported through record_render() give the share of GUI
+    time spent drawing over the last `load_window` seconds. Above
+    `high_load`, transformation() switches scaling to Qt.FastTransformation;
+    it switches back to smooth scaling below `low_load`.
+    """
+
+    def __init__(self, parent=None, unfocused_interval=0.2, high_load=0.3, low_load=0.15,
+                 load_window=1.0):
+        super().__init__(parent)
+        self.unfocused_interval = unfocused_interval
+        self.high_load = high_load
+        self.low_load = low_load
+        self.load_window = load_window
+        self.views = {}
+        self.smooth = True
+        self.load = 0.0
+        self._windows = set()
+        self._busy = 0.0
+        self._window_start = time.monotonic()
+
+    def register(self, widget, min_interval=0.0, unfocused_interval=None):
+        """Track a widget. `min_interval` caps its update rate even when focused."""
+        view = _View(widget, min_interval,
+                     self.unfocused_interval if unfocused_interval is None else unfocused_interval)
+        self.views[widget] = view
+        widget.installEventFilter(self)
+        window = widget.window()
+        if window is not widget and window not in self._windows:
+            window.installEventFilter(self)
+            self._windows.add(window)
+        self._refresh(view)
+        return view
+
+    def unregister(self, widget):
+        if self.views.pop(widget, None) is not None:
+            widget.removeEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() in _STATE_EVENTS:
+            if obj in self._windows:
+                for view in self.views.values():
+                    if view.widget.window() is obj:
+                        self._refresh(view)
+            else:
+                view = self.views.get(obj)
+                if view is not None:
+                    self._refresh(view)
+        return False
+
+    @staticmethod
+    def _refresh(view):
+        widget = view.widget
+        window = widget.window()
+        view.width = widget.width()
+        view.height = widget.height()
+        view.visible = (widget.isVisible() and not window.isMinimized()
+                        and view.width > 0 and view.height > 0)
+        view.focused = window.isActiveWindow()
+
+    def should_update(self, widget, now=None):
+        """Return True if the widget should be redrawn now, and count the update."""
+        view = self.views.get(widget)
+        if view is None:
+            return True
+        if not view.visible:
+            view.skipped += 1
+            return False
+        now = time.monotonic() if now is None else now
+        interval = view.min_interval if view.focused else max(view.min_interval,
+                                                              view.unfocused_interval)
+        if now - view.last_update < interval:
+            view.skipped += 1
+            return False
+        view.last_update = now
+        view.updates += 1
+        return True
+
+    def size(self, widget):
+        """Cached (width, height) of a registered widget."""
+        view = self.views[widget]
+        return view.width, view.height
+
+    def record_render(self, seconds, now=None):
+        """Add the time one redraw took; updates the render load and scaling mode."""
+        now = time.monotonic() if now is None else now
+        self._busy += seconds
+        elapsed = now - self._window_start
+        if elapsed >= self.load_window:
+            self.load = self._busy / elapsed
+            self._busy = 0.0
+            self._window_start = now
+            if self.smooth and self.load > self.high_load:
+                self.smooth = False
+            elif not self.smooth and self.load < self.low_load:
+                self.smooth = True
+
+    def transformation(self):
+        """Qt scaling mode to use for the next redraw."""
+        return Qt.SmoothTransformation if self.smooth else Qt.FastTransformation
+
+    def stats(self):
+        """Return {widget: (updates, skipped)} for every registered view."""
+        return {widget: (view.updates, view.skipped) for widget, view in self.views.items()}
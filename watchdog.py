@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Supervisor(threading.Thread):
+    """
+    Fail-safe watchdog running on its own thread.
+
+    Sources (the GUI loop, the control loop) are registered with a deadline
+    and must call heartbeat() more often than that. When any source misses
+    its deadline the supervisor applies the fail-safe action directly on the
+    MaestroController, without going through the GUI thread: 'hold' freezes
+    the arm at its last targets, 'limp' sets every channel to target 0. The
+    worst-case reaction time is one check interval plus one serial write
+    timeout; every trip's measured reaction time is kept.
+
+    While all sources are healthy the supervisor also sends a keep-alive so
+    the Maestro's own serial timeout (see maestro_usb.set_serial_timeout)
+    only fires if this whole process stops.
+    """
+
+    def __init__(self, servo_controller, action='limp', check_interval=0.01,
+                 keepalive_interval=None, on_trip=None):
+        super().__init__(daemon=True)
+        if action not in ('hold', 'limp'):
+            raise ValueError(f"Invalid fail-safe action: {action}")
+        self.servo_controller = servo_controller
+        self.action = action
+        self.check_interval = check_interval
+        self.keepalive_interval = keepalive_interval
+        self.on_trip = on_trip
+        self.deadlines = {}
+        self.heartbeats = {}
+        self.tripped = None
+        self.reaction_times = []
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._last_keepalive = 0.0
+
+    def register(self, source, deadline):
+        """Start supervising `source`, which must beat at least every `deadline` seconds."""
+        with self._lock:
+            self.deadlines[source] = deadline
+            self.heartbeats[source] = time.monotonic()
+
+    def unregister(self, source):
+        """Stop supervising `source`."""
+        with self._lock:
+            self.deadlines.pop(source, None)
+            self.heartbeats.pop(source, None)
+
+    def heartbeat(self, source):
+        """Report that `source` is alive. Cheap enough to call every tick."""
+        if source in self.deadlines:
+            self.heartbeats[source] = time.monotonic()
+
+    def reset(self):
+        """Clear a trip, restart all deadlines and let the arm move again."""
+        with self._lock:
+            now = time.monotonic()
+            for source in self.heartbeats:
+                self.heartbeats[source] = now
+            self.tripped = None
+        if self.servo_controller:
+            self.servo_controller.release()
+
+    def stop(self):
+        """Stop the supervisor thread."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+    def max_reaction_time(self):
+        return max(self.reaction_times) if self.reaction_times else None
+
+    def run(self):
+        while not self._stop_event.wait(self.check_interval):
+            now = time.monotonic()
+            missed = None
+            with self._lock:
+                if self.tripped is None:
+                    for source, deadline in self.deadlines.items():
+                        expired_at = self.heartbeats[source] + deadline
+                        if now > expired_at:
+                            missed = (source, expired_at)
+                            break
+
+            if missed is not None:
+                self._trip(*missed)
+            elif self.tripped is None:
+                self._keepalive(now)
+
+    def _trip(self, source, expired_at):
+        try:
+            if self.servo_controller:
+                if self.action == 'limp':
+                    self.servo_controller.go_limp()
+                else:
+                    self.servo_controller.hold()
+        except Exception as e:
+            logger.error("Watchdog failed to apply %s: %s", self.action, e)
+        # Time from the missed deadline until the fail-safe was applied
+        reaction = time.monotonic() - expired_at
+        self.tripped = source
+        self.reaction_times.append(reaction)
+        logger.critical("Watchdog: '%s' missed its deadline, applied %s after %.1f ms",
+                        source, self.action, reaction * 1000)
+        if self.on_trip:
+            self.on_trip(source, reaction)
+
+    def _keepalive(self, now):
+        if not self.keepalive_interval or now - self._last_keepalive < self.keepalive_interval:
+            return
+        self._last_keepalive = now
+        if self.servo_controller:
+            try:
+                self.servo_controller.get_errors()
+            except Exception as e:
+                logger.warning("Watchdog keep-alive failed: %s", e)
+
+
+class _SimulatedMaestro:
+    """Stand-in for MaestroController that records when a fail-safe is applied."""
+
+    def __init__(self):
+        self.applied_at = None
+
+    def go_limp(self):
+        self.applied_at = time.monotonic()
+
+    def hold(self):
+        self.applied_at = time.monotonic()
+
+    def release(self):
+        self.applied_at = None
+
+    def get_errors(self):
+        return 0
+
+
+def simulate_stall(trials=20, deadline=0.1, check_interval=0.01, beat_interval=0.02):
+    """
+    Beat a heartbeat, stop as if the control loop hung, and measure how long
+    after the missed deadline the fail-safe is applied. Returns the reaction
+    times in seconds; each must stay below check_interval plus scheduling jitter.
+    """
+    maestro = _SimulatedMaestro()
+    supervisor = Supervisor(maestro, check_interval=check_interval)
+    supervisor.register('control', deadline)
+    supervisor.start()
+    reactions = []
+    try:
+        for _ in range(trials):
+            supervisor.reset()
+            for _ in range(5):
+                supervisor.heartbeat('control')
+                time.sleep(beat_interval)
+            if supervisor.tripped is not None:
+                raise AssertionError("Watchdog tripped while heartbeats were on time")
+
+            # Stall: no more heartbeats
+            last_beat = supervisor.heartbeats['control']
+            timeout = time.monotonic() + deadline + 1.0
+            while maestro.applied_at is None and time.monotonic() < timeout:
+                time.sleep(check_interval / 4)
+            if maestro.applied_at is None:
+                raise AssertionError("Watchdog did not react to a stall")
+            reactions.append(maestro.applied_at - (last_beat + deadline))
+    finally:
+        supervisor.stop()
+    return reactions
+
+
+if __name__ == "__main__":
+    # Same as `python -m robot_arm_control bench watchdog`
+    from robot_arm_control import main
+    raise SystemExit(main(['bench', 'watchdog']))